@@ -1,8 +1,12 @@
 import streamlit as st
 import os
+import pandas as pd
 from datetime import datetime
 import streamlit.components.v1 as components
 
+# 🐄 Copy-on-Write: 캐시에서 공유하는 프레임을 파생/수정해도 원본은 복사 없이 보호된다 (앱 전체에 한 번)
+pd.set_option("mode.copy_on_write", True)
+
 st.set_page_config(page_title="EV 충전소 현황", layout="wide")
 st.title("🏠전기차 충전소 데이터 홈")
 
@@ -0,0 +1,61 @@
+# analytics_utils.py
+# 🦆 cache/ 파일을 바로 조회하는 임베디드 SQL 엔진 (DuckDB - 설치되어 있을 때만 사용)
+#  - 전국 Arrow 스냅샷·parquet 캐시를 pandas 프레임으로 올리지 않고 파일에서 바로 스캔
+#  - 모든 코어로 병렬 스캔, 필요한 컬럼과 WHERE 조건은 파일 스캔 단계까지 내려보낸다
+#  - duckdb 가 없거나 파일이 아직 없으면 None → 호출한 쪽이 MySQL 로 조회
+import logging
+import os
+import re
+
+import pyarrow.dataset as ds
+
+from cache_utils import cache_path
+
+try:
+    import duckdb
+except ImportError:  # 선택 설치: pip install duckdb
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+LOCAL_ANALYTICS_ENABLED = True   # False 이면 항상 MySQL 로 집계
+LOCAL_THREADS = os.cpu_count() or 1
+# SQLAlchemy 의 :name 파라미터 → DuckDB 의 $name ('::' 형 변환은 건드리지 않음)
+_NAMED_PARAM = re.compile(r"(?<![:\w]):(\w+)")
+
+
+def local_analytics_available(*names):
+    """
+    DuckDB 가 설치되어 있고 cache/ 에 names 파일이 모두 있으면 True.
+    """
+    return (
+        duckdb is not None and LOCAL_ANALYTICS_ENABLED
+        and all(os.path.exists(cache_path(name)) for name in names)
+    )
+
+
+def _dataset(name):
+    # 파일 확장자로 형식 판단 (.arrow = 압축 없는 Arrow IPC 스냅샷)
+    return ds.dataset(cache_path(name), format="ipc" if name.endswith(".arrow") else "parquet")
+
+
+def query_cache(query, tables, params=None):
+    """
+    tables: {SQL 안의 테이블 이름: cache/ 파일 이름}. query 는 read_sql 과 같은 :name 파라미터를 쓴다.
+    결과 DataFrame, 로컬 엔진을 쓸 수 없거나 실패하면 None.
+    """
+    if not local_analytics_available(*tables.values()):
+        return None
+
+    # 조회마다 메모리 DB 를 새로 연다 - 스레드 간 공유 상태가 없고, 교체된 파일도 바로 반영
+    con = duckdb.connect()
+    try:
+        con.execute(f"SET threads = {LOCAL_THREADS}")
+        for table, name in tables.items():
+            con.register(table, _dataset(name))
+        return con.execute(_NAMED_PARAM.sub(r"$\1", str(query)), params or {}).df()
+    except (duckdb.Error, OSError):
+        logger.exception("로컬 집계 실패, DB 조회로 전환: %s", list(tables.values()))
+        return None
+    finally:
+        con.close()
@@ -0,0 +1,253 @@
+# cache_utils.py
+# 💾 여러 Streamlit 서버 프로세스가 함께 쓰는 cache/ 디렉터리 관리
+#  - 항목별 advisory lock: 한 프로세스만 DB 조회/파일 생성, 나머지는 기다렸다가 재사용
+#  - 원자적 게시: 임시 파일에 다 쓴 뒤 os.replace
+#  - 공유 인덱스(cache/index.json): 각 파일이 담고 있는 범위/행 수/생성 시각
+import json
+import os
+import socket
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+CACHE_DIR = "cache"
+INDEX_PATH = os.path.join(CACHE_DIR, "index.json")
+LOCK_TIMEOUT = 300  # 다른 프로세스가 만드는 중일 때 최대 대기 시간 (초)
+
+
+def cache_path(name):
+    return os.path.join(CACHE_DIR, name)
+
+
+# 🔒 advisory file lock
+def _try_lock(fd):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+
+def _unlock(fd):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(lock_path, timeout=LOCK_TIMEOUT, poll_interval=0.1):
+    """
+    lock_path 에 대한 배타적 잠금. 프로세스가 죽으면 OS가 잠금을 풀어준다.
+    """
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                _try_lock(fd)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"캐시 잠금 대기 시간 초과: {lock_path}")
+                time.sleep(poll_interval)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+# 📤 원자적 게시: write_fn(임시 경로) → os.replace
+def atomic_publish(path, write_fn):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    try:
+        write_fn(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# 📒 공유 인덱스
+def read_cache_index():
+    if not os.path.exists(INDEX_PATH):
+        return {}
+    with open(INDEX_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def update_cache_index(name, entry):
+    with file_lock(INDEX_PATH + ".lock"):
+        index = read_cache_index()
+        if entry is None:
+            index.pop(name, None)
+        else:
+            index[name] = entry
+
+        def write(tmp_path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False, indent=2)
+
+        atomic_publish(INDEX_PATH, write)
+
+
+# 📦 파일 형식
+def write_arrow(df, path):
+    """
+    압축 없는 Arrow IPC(Feather v2) 파일 - 메모리 매핑으로 바로 열 수 있다.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def map_arrow(path):
+    """
+    Arrow 파일을 메모리 매핑으로 연다. 컬럼은 ArrowDtype 으로 mmap 버퍼를 그대로 가리키므로
+    역직렬화/복사가 없고, 여러 워커 프로세스가 같은 OS 페이지 캐시를 공유한다.
+    """
+    source = pa.memory_map(path, "r")
+    table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def read_table(path, fmt="parquet"):
+    if fmt == "parquet":
+        return pq.read_table(path)
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def write_table(table, path, fmt="parquet"):
+    if fmt == "parquet":
+        pq.write_table(table, path)
+    else:
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    return table.num_rows
+
+
+CACHE_FORMATS = {
+    # reopen=True: 만든 프레임 대신 게시된 파일을 다시 열어 반환 (mmap 공유)
+    "parquet": {"write": lambda df, path: df.to_parquet(path, index=False), "read": pd.read_parquet, "reopen": False},
+    "arrow": {"write": write_arrow, "read": map_arrow, "reopen": True},
+}
+
+
+def write_batches(batches, path, fmt="parquet"):
+    """
+    RecordBatch 를 하나씩 받아 파일에 이어 쓴다 (메모리에는 한 배치만 유지). 반환: 기록한 행 수
+    """
+    rows = 0
+    writer = None
+    try:
+        for batch in batches:
+            if writer is None:
+                if fmt == "parquet":
+                    writer = pq.ParquetWriter(path, batch.schema)
+                else:
+                    writer = pa.ipc.new_file(path, batch.schema)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:  # 결과 0건
+        CACHE_FORMATS[fmt]["write"](pd.DataFrame(), path)
+    return rows
+
+
+def _build_entry(name, fmt, meta, timeout, rebuild, write_fn):
+    """
+    잠금을 잡고 (rebuild 가 아니면) 한 번 더 확인한 뒤, write_fn(임시 경로) → 게시 → 인덱스 갱신.
+    이미 다른 프로세스가 만들어 두었으면 None, 새로 만들었으면 write_fn 의 반환값(행 수)을 돌려준다.
+    """
+    path = cache_path(name)
+    with file_lock(path + ".lock", timeout=timeout):
+        # 기다리는 동안 다른 프로세스가 만들었으면 재사용
+        if not rebuild and os.path.exists(path):
+            return None
+
+        result = {}
+        atomic_publish(path, lambda tmp_path: result.update(rows=write_fn(tmp_path)))
+        update_cache_index(name, {
+            **(meta or {}),
+            "format": fmt,
+            "rows": result["rows"],
+            "bytes": os.path.getsize(path),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "builder": f"{socket.gethostname()}:{os.getpid()}",
+        })
+        return result["rows"]
+
+
+def get_or_build_frame(name, build_fn, fmt="parquet", meta=None, timeout=LOCK_TIMEOUT):
+    """
+    cache/name 파일이 있으면 읽고, 없으면 잠금을 잡은 프로세스 하나만 build_fn() 으로 만들어 게시한다.
+    잠금을 기다린 다른 프로세스는 그 사이 게시된 파일을 그대로 읽는다.
+    """
+    spec = CACHE_FORMATS[fmt]
+    path = cache_path(name)
+
+    if os.path.exists(path):
+        return spec["read"](path)
+
+    built = {}
+
+    def write(tmp_path):
+        built["df"] = build_fn()
+        spec["write"](built["df"], tmp_path)
+        return len(built["df"])
+
+    if _build_entry(name, fmt, meta, timeout, False, write) is None:
+        return spec["read"](path)
+    return spec["read"](path) if spec["reopen"] else built["df"]
+
+
+def get_or_build_file(name, write_fn, fmt="parquet", meta=None, timeout=LOCK_TIMEOUT, rebuild=False):
+    """
+    스트리밍 생성용: write_fn(임시 경로) 가 파일을 직접 쓰고 기록한 행 수를 돌려준다.
+    rebuild=True 이면 파일이 있어도 다시 만들어 교체한다. 게시된 파일을 열어 반환.
+    """
+    spec = CACHE_FORMATS[fmt]
+    path = cache_path(name)
+
+    if rebuild or not os.path.exists(path):
+        _build_entry(name, fmt, meta, timeout, rebuild, write_fn)
+    return spec["read"](path)
+
+
+def replace_entry(name, write_fn, fmt="parquet", meta=None, timeout=LOCK_TIMEOUT):
+    """
+    이미 있는 항목을 잠금 안에서 고쳐 쓴다 (증분 갱신용). write_fn(임시 경로) 안에서
+    기존 파일을 읽어야 다른 프로세스의 갱신과 섞이지 않는다. 반환: 기록한 행 수
+    """
+    return _build_entry(name, fmt, meta, timeout, True, write_fn)
+
+
+def remove_entry(name, timeout=LOCK_TIMEOUT):
+    """
+    항목을 지운다 - 다음 조회 때 DB에서 다시 만든다.
+    """
+    path = cache_path(name)
+    with file_lock(path + ".lock", timeout=timeout):
+        if os.path.exists(path):
+            os.remove(path)
+        update_cache_index(name, None)
@@ -0,0 +1,251 @@
+# chart_utils.py
+# 📊 데이터 도식화 페이지의 차트 - 차트 하나씩 따로 만들고, 완성된 figure JSON 을 캐시
+#  - 캐시 키: (데이터 버전, 시/도, 구/군, 차트 id) → 한 번 본 지역은 다시 실행해도 figure 를 새로 만들지 않는다
+#  - 데이터 버전 = 마지막 증분 동기화 시각 (sync_utils 워터마크) - 동기화되면 모든 차트가 새로 만들어짐
+#  - DB 장애 중 마지막 정상 집계로 만든 차트는 캐시하지 않는다
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from cache_utils import read_cache_index
+from db_utils import (
+    get_charger_counts, get_subsidy_by_region, get_subsidy_table,
+    is_stale, serve_stale, DatabaseUnavailable
+)
+
+
+# 차트 id → 이름 (칸별 켜기 토글, 실행 시간 구간 이름)
+CHARTS = {
+    "stations": "📍 충전소 수",
+    "capacity": "⚡ 용량별 분포",
+    "charger_type": "🔌 충전기 종류",
+    "facility": "🏢 시설 유형",
+    "density": "📌 용량 밀도",
+    "subsidy": "💰 보조금",
+}
+
+
+def get_data_version():
+    """
+    차트 캐시 키에 넣을 데이터 버전 (마지막 동기화 시각). 동기화 기록이 없으면 빈 문자열.
+    """
+    synced = [
+        entry.get("synced_at", "") for entry in read_cache_index().values()
+        if entry.get("kind") == "sync_watermark"
+    ]
+    return max(synced, default="")
+
+
+def _top_n_with_others(chart, label_col, top_n):
+    # 상위 top_n + 나머지는 '기타' 한 줄로
+    chart = chart.sort_values(by="충전기 수", ascending=False)
+    if len(chart) > top_n:
+        others = pd.DataFrame({label_col: ["기타"], "충전기 수": [chart["충전기 수"][top_n:].sum()]})
+        chart = pd.concat([chart.head(top_n), others], ignore_index=True)
+    return chart
+
+
+# 🔹 차트별 생성 함수: (figure, 사용한 집계 표 목록) 반환
+def _stations_chart(region, district, scope_district):
+    if region == "전국":
+        counts = get_charger_counts("region_name", count_stations=True)
+        region_chart = counts.rename(columns={'region_name': '시/도', 'count': '충전소 수'})
+        fig = px.bar(
+            region_chart, x='시/도', y='충전소 수',
+            title="📍 전국 시/도별 충전소 수",
+            color='시/도', text='충전소 수',
+            color_discrete_sequence=px.colors.qualitative.Set2
+        )
+    else:
+        counts = get_charger_counts("district_name", region=region, count_stations=True)
+        district_chart = counts.rename(columns={'district_name': '구/군', 'count': '충전소 수'})
+        top_chart = district_chart.sort_values(by='충전소 수', ascending=False).head(10)
+        if district not in top_chart['구/군'].values:
+            selected_row = district_chart[district_chart['구/군'] == district]
+            top_chart = pd.concat([top_chart, selected_row], ignore_index=True)
+
+        fig = px.bar(
+            top_chart, x='구/군', y='충전소 수',
+            title=f"📍 '{region}' 내 구/군별 충전소 수 (선택: {district})",
+            color='구/군', text='충전소 수',
+            color_discrete_sequence=px.colors.qualitative.Set2
+        )
+    fig.update_layout(xaxis_tickangle=-45, height=350)
+    return fig, [counts]
+
+
+def _capacity_chart(region, district, scope_district):
+    counts = get_charger_counts("capacity", region=region, district=scope_district)
+    capacity_chart = _top_n_with_others(counts.set_axis(["용량", "충전기 수"], axis=1), "용량", 6)
+
+    # 비율 계산
+    capacity_chart["비율"] = (capacity_chart["충전기 수"] / capacity_chart["충전기 수"].sum() * 100).round(1)
+    capacity_chart["레이블"] = capacity_chart["용량"].astype(str) + "<br>" + capacity_chart["비율"].astype(str) + "%"
+
+    fig = px.pie(
+        capacity_chart,
+        names="레이블",
+        values="충전기 수",
+        title="⚡ 용량별 충전기 분포 (Top 6 + 기타)",
+        hole=0.4,
+        color_discrete_sequence=px.colors.qualitative.Bold
+    )
+    fig.update_traces(textposition="inside", textinfo="percent+label")
+    fig.update_layout(height=350)
+    return fig, [counts]
+
+
+def _share_bar(counts, label_col, top_n, title, palette, tickangle):
+    chart = _top_n_with_others(counts.set_axis([label_col, "충전기 수"], axis=1), label_col, top_n)
+    chart["비율"] = (chart["충전기 수"] / chart["충전기 수"].sum() * 100).round(1)
+
+    fig = px.bar(
+        chart,
+        x=label_col,
+        y="충전기 수",
+        color=label_col,
+        text="비율",
+        title=title,
+        color_discrete_sequence=palette,
+    )
+    fig.update_traces(texttemplate="%{y}기 (%{text}%)", textposition="outside")
+    fig.update_layout(yaxis_type="log", xaxis_tickangle=tickangle, height=350)
+    return fig
+
+
+def _charger_type_chart(region, district, scope_district):
+    counts = get_charger_counts("charger_type", region=region, district=scope_district)
+    fig = _share_bar(counts, "종류", 5, "🔌 충전기 종류별 분포 (로그스케일)", px.colors.qualitative.Pastel, -45)
+    return fig, [counts]
+
+
+def _facility_chart(region, district, scope_district):
+    counts = get_charger_counts("facility_major", region=region, district=scope_district)
+    fig = _share_bar(counts, "시설 유형", 8, "🏢 시설 유형별 충전기 수 (로그스케일)", px.colors.qualitative.Dark24, -30)
+    return fig, [counts]
+
+
+def _density_chart(region, district, scope_district):
+    if region == "전국":
+        counts = get_charger_counts(["region_name", "capacity"])
+        density_df = counts.set_axis(["시도", "용량", "충전기 수"], axis=1)
+
+        # 시도 × 용량 행렬을 서버에서 만들어 보낸다 (브라우저에서 행마다 구간 집계하지 않음)
+        matrix = density_df.pivot_table(index="용량", columns="시도", values="충전기 수", aggfunc="sum",
+                                        fill_value=0, observed=True)
+        # ⚠️ 로그 변환 (log(1+x)로 음수 방지)
+        log_matrix = np.log1p(matrix)
+        fig = go.Figure(go.Heatmap(
+            z=log_matrix.to_numpy(),
+            x=matrix.columns.astype(str),
+            y=matrix.index.astype(str),
+            customdata=matrix.to_numpy(),
+            colorscale="Turbo",
+            colorbar=dict(title="log_충전기 수"),
+            texttemplate="%{z:.1f}",
+            hovertemplate="시도=%{x}<br>용량=%{y}<br>충전기 수=%{customdata}<extra></extra>",
+        ))
+        fig.update_layout(
+            title="📌 시도별 용량·충전기 밀도 (log)",
+            height=450, xaxis_tickangle=-45,
+            xaxis_title="시도", yaxis_title="용량", yaxis_type="category",
+        )
+    else:
+        counts = get_charger_counts("capacity", region=region, district=scope_district)
+        bar_df = counts.set_axis(["용량", "충전기 수"], axis=1)
+        bar_df["log_충전기 수"] = np.log1p(bar_df["충전기 수"])
+
+        fig = px.bar(
+            bar_df,
+            x="log_충전기 수", y="용량",
+            orientation="h",
+            title=f"📌 {region} {district} 내 용량별 충전기 수 (log)",
+            color="용량",
+            text="충전기 수",
+            color_discrete_sequence=px.colors.qualitative.Set3,
+        )
+        fig.update_layout(height=450, yaxis=dict(categoryorder="total ascending"))
+    return fig, [counts]
+
+
+def _subsidy_chart(region, district, scope_district):
+    # 전국일 때만 차트 - 시/도를 고르면 페이지에서 보조금 요약 지표로 표시
+    subsidy_df = get_subsidy_by_region().set_axis(["시도", "충전기 수", "평균 보조금"], axis=1)
+    avg_subsidy = subsidy_df["평균 보조금"].mean()
+
+    fig = px.scatter(
+        subsidy_df,
+        x="충전기 수",
+        y="평균 보조금",
+        size="충전기 수",
+        color="시도",
+        hover_name="시도",
+        title="💰 충전기 수 vs 평균 보조금",
+        size_max=40,
+        log_x=True,  # 🔍 충전기 수 차이 완화
+        render_mode="webgl",
+        color_discrete_sequence=px.colors.qualitative.Bold
+    )
+
+    # ✅ 평균선 추가
+    fig.add_hline(
+        y=avg_subsidy,
+        line_dash="dot",
+        line_color="gray",
+        annotation_text=f"평균 보조금 ≈ {int(avg_subsidy)}만원",
+        annotation_position="top left"
+    )
+
+    # ✅ 레이아웃 개선
+    fig.update_layout(
+        height=500,
+        xaxis_title="충전기 수 (log scale)",
+        yaxis_title="평균 보조금 (만원)",
+        xaxis=dict(
+            showgrid=True, gridcolor="#f0f0f0",
+            range=[4.2, np.log10(subsidy_df["충전기 수"].max() * 1.2)],
+        ),
+        yaxis=dict(showgrid=True, gridcolor="#f0f0f0"),
+        plot_bgcolor="white",
+        title_font_size=20,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5)
+    )
+    fig.update_traces(marker=dict(line=dict(width=1, color="DarkSlateGrey")))
+    # 병합·집계를 거치면 기준 시각 표시가 사라지므로 원본 표로 확인
+    return fig, [get_charger_counts(["region_name", "district_name"]), get_subsidy_table()]
+
+
+_CHART_BUILDERS = {
+    "stations": _stations_chart,
+    "capacity": _capacity_chart,
+    "charger_type": _charger_type_chart,
+    "facility": _facility_chart,
+    "density": _density_chart,
+    "subsidy": _subsidy_chart,
+}
+
+
+def combine_freshness(freshness):
+    """기준 시각 정보 여러 개 → 가장 오래된 시각 하나 (하나라도 마지막 정상 결과면 stale)"""
+    stale = any(f.get("stale") for f in freshness)
+    as_of = min((f["as_of"] for f in freshness if f.get("as_of")), default=None)
+    source = "stale" if stale else next((f["source"] for f in freshness if f.get("source")), None)
+    return {"source": source, "as_of": as_of, "stale": stale}
+
+
+@serve_stale()
+@st.cache_data(ttl=600, max_entries=512)
+def get_figure_json(data_version, chart_id, region, district):
+    """
+    차트 하나를 만들어 (plotly JSON 문자열, 기준 시각 정보) 로 반환 (data_version 은 캐시 키로만 쓴다).
+    기준 시각 정보는 ev_ui_utils.render_freshness 에 넘기면 된다 - 표시용 집계를 따로 조회하지 않도록.
+    집계가 마지막 정상 결과이면 캐시하지 않고 그대로 돌려준다.
+    """
+    scope_district = None if district == "전체" else district
+    fig, sources = _CHART_BUILDERS[chart_id](region, district, scope_district)
+    result = fig.to_json(), combine_freshness([df.attrs.get("freshness", {}) for df in sources])
+    if result[1]["stale"]:
+        raise DatabaseUnavailable("마지막 정상 집계로 만든 차트", stale=result)
+    return result
@@ -1,19 +1,41 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from db_utils import (
     get_station_data,
     get_region_list,
     get_region_center,         # ✅ 이게 실제 좌표 기반 조회 함수
-    normalize_station_name
+    normalize_station_name,
+    make_display_name,
+    register_shared_frame,
+    get_shared_frames,
+    get_single_flight_stats,
+    attach_subsidy,
+    get_subsidy_table,
+    get_db_health,
+    mark_freshness,
+    is_stale,
+    serve_stale,
+    DatabaseUnavailable
 )
 
 from utils import (
-    get_sorted_district_list   # ✅ utils에 있는 함수만 이쪽에서 import
+    get_sorted_district_list,   # ✅ utils에 있는 함수만 이쪽에서 import
+    MAP_RENDER_MODES
 )
 import os
+import sys
+from cache_utils import cache_path, get_or_build_frame
+from prefetch_utils import schedule_prefetch, current_session_id, get_prefetch_stats
+from search_utils import get_station_search_index, search_stations
+from hours_utils import WEEKDAY_NAMES, DAY_MINUTES, KST, get_station_hours, open_mask, week_minute
 
 from streamlit_folium import st_folium
 import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
 
 def init_session_state(keys_with_defaults):
     """
@@ -23,6 +45,147 @@ def init_session_state(keys_with_defaults):
         if key not in st.session_state:
             st.session_state[key] = default
 
+# ⏱️ 프래그먼트/구간별 실행 시간 기록
+def record_timing(name, elapsed_ms):
+    timings = st.session_state.setdefault("fragment_timings", {})
+    entry = timings.setdefault(name, {"runs": 0, "last_ms": 0.0, "total_ms": 0.0})
+    entry["runs"] += 1
+    entry["last_ms"] = elapsed_ms
+    entry["total_ms"] += elapsed_ms
+
+
+@contextmanager
+def timed_section(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, (time.perf_counter() - start) * 1000)
+
+
+def timed_fragment(name):
+    """
+    함수를 st.experimental_fragment 로 감싸 위젯 조작 시 해당 프래그먼트만 다시 실행하고,
+    실행 시간을 name 으로 기록한다.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed_section(name):
+                return func(*args, **kwargs)
+        return st.experimental_fragment(wrapper)
+    return decorator
+
+
+def render_timing_report():
+    timings = st.session_state.get("fragment_timings", {})
+    with st.expander("⏱️ 실행 시간 (직전 실행 기준)", expanded=False):
+        db_stats = get_single_flight_stats()
+        st.caption(
+            f"🛫 DB 조회 (프로세스 누적): 요청 {db_stats['requests']}건 / "
+            f"실제 실행 {db_stats['queries']}건 / 중복 합침 {db_stats['coalesced']}건"
+        )
+        prefetch_stats = get_prefetch_stats()
+        st.caption(
+            f"🔮 프리페치: 완료 {prefetch_stats['done']}건 / 취소 {prefetch_stats['cancelled']}건 / "
+            f"메모리 예산 초과 {prefetch_stats['skipped_budget']}건 / 실패 {prefetch_stats['failed']}건"
+        )
+        health = get_db_health()
+        st.caption(
+            f"🔌 DB 상태: {health['state']} / 시간 초과 {health['timeouts']}건 / "
+            f"저장된 결과로 응답 {health['stale_served']}건"
+        )
+        if not timings:
+            st.caption("아직 기록된 실행 시간이 없습니다.")
+            return
+        report = pd.DataFrame([
+            {
+                "구간": name,
+                "실행 횟수": entry["runs"],
+                "최근 (ms)": round(entry["last_ms"], 1),
+                "평균 (ms)": round(entry["total_ms"] / entry["runs"], 1),
+            }
+            for name, entry in timings.items()
+        ])
+        st.dataframe(report, hide_index=True, use_container_width=True)
+
+
+# 🕒 데이터 기준 시각 / DB 상태 표시
+FRESHNESS_SOURCES = {"db": "DB 조회", "cache": "저장된 캐시", "stale": "마지막 정상 조회", "snapshot": "전국 스냅샷"}
+
+
+def render_freshness_indicator(df):
+    render_freshness(df.attrs.get("freshness", {}))
+
+
+def render_freshness(freshness):
+    as_of = freshness.get("as_of") or "-"
+    source = FRESHNESS_SOURCES.get(freshness.get("source"), "-")
+    health = get_db_health()
+
+    if freshness.get("stale"):
+        st.warning(f"⚠️ DB 응답 없음 — {as_of} 기준 {source} 데이터를 표시 중입니다. 복구되면 자동으로 새로 불러옵니다.")
+    elif health["state"] != "closed":
+        st.info(f"🟠 DB 연결 불안정 — 일부 목록은 마지막 정상 조회 결과일 수 있습니다. (데이터 기준: {as_of}, {source})")
+    else:
+        st.caption(f"🟢 데이터 기준: {as_of} ({source})")
+
+
+# 🗺️ 지도 표시 방식 - 페이지마다 key 를 달리해 따로 고른다
+def render_map_mode_selector(key):
+    return st.sidebar.radio(
+        "🗺️ 지도 표시 방식",
+        list(MAP_RENDER_MODES),
+        format_func=MAP_RENDER_MODES.get,
+        key=key,
+        help="자동: 충전소가 많은 범위는 캔버스(GeoJSON)로 한 번에 그립니다."
+    )
+
+
+# 🧠 메모리 사용량 추정
+def estimate_object_bytes(obj, shared_ids, seen=None):
+    """
+    세션 상태 값의 대략적인 메모리 크기. 공유 프레임(shared_ids)은 세션 몫에서 제외한다.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen or id(obj) in shared_ids:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_object_bytes(v, shared_ids, seen) for v in obj.values())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(estimate_object_bytes(v, shared_ids, seen) for v in obj)
+    return sys.getsizeof(obj)
+
+
+def render_memory_report():
+    if not st.sidebar.toggle("🧠 메모리 사용량 보기", key="show_memory_report"):
+        return
+
+    shared = get_shared_frames()
+    shared_ids = {id(df) for df in shared.values()}
+    shared_bytes = sum(int(df.memory_usage(deep=True).sum()) for df in shared.values())
+    session_items = {
+        key: estimate_object_bytes(value, shared_ids)
+        for key, value in st.session_state.items()
+    }
+    session_bytes = sum(session_items.values())
+
+    with st.sidebar:
+        st.markdown("#### 🧠 메모리 사용량")
+        st.markdown(f"- 📦 공유 프레임 (프로세스당 1회): `{shared_bytes / 1024**2:.1f}` MB, `{len(shared)}`개")
+        st.markdown(f"- 👤 현재 세션 전용: `{session_bytes / 1024**2:.2f}` MB")
+        top_items = sorted(session_items.items(), key=lambda kv: kv[1], reverse=True)[:5]
+        for key, size in top_items:
+            st.caption(f"{key}: {size / 1024:.1f} KB")
+
+
 def render_region_district_with_summary():
     default_region = "충청남도"
     default_district = "논산시 "
@@ -51,7 +214,10 @@ def render_region_district_with_summary():
 
     # 구/군 선택 (col2)
     with col2:
-        if region == default_region and default_district in district_list:
+        # 검색으로 이동한 경우 등 직전 선택값이 목록에 있으면 그대로 유지
+        if st.session_state.get("last_district") in district_list:
+            default_district_val = st.session_state.last_district
+        elif region == default_region and default_district in district_list:
             default_district_val = default_district
         else:
             default_district_val = district_list[0]
@@ -65,6 +231,9 @@ def render_region_district_with_summary():
 
     # 데이터 로딩
     df = get_station_data(region, district)
+
+    # 🔮 선택한 구/군에서 가까운 구/군들을 백그라운드로 미리 불러오기
+    prefetch_nearby_districts(region, district, df, district_list)
     
     # 요약 출력 (col3)
     with col3:
@@ -85,9 +254,32 @@ def render_region_district_with_summary():
 
 
 
+def prefetch_nearby_districts(region, district, df, district_list):
+    """
+    선택한 구/군 충전소의 평균 좌표에서 가까운 순으로 district_list 의 다른 구/군을 미리 불러오게 예약한다.
+    '전체'이거나 좌표가 없으면 시/도 중심 기준. 선택이 바뀌면 이전 예약은 취소된다.
+    """
+    if district != "전체" and df[['latitude', 'longitude']].notna().any().all():
+        anchor_lat, anchor_lon = df['latitude'].mean(), df['longitude'].mean()
+    else:
+        anchor_lat, anchor_lon = get_region_center(region)
+    # 거리순 목록과 선택 상자 목록의 표기(끝 공백 등)가 다를 수 있어 선택 상자 값으로 맞춘다
+    listed = {str(d).strip(): d for d in district_list if d != "전체"}
+    next_districts = [
+        listed[str(d).strip()] for d in get_sorted_district_list(region, anchor_lat, anchor_lon)
+        if str(d).strip() in listed and listed[str(d).strip()] != district
+    ]
+    schedule_prefetch(current_session_id(), region, next_districts, [get_station_data, load_or_generate_summary])
+
+
+def _format_subsidy(value):
+    value = pd.to_numeric(value, errors="coerce")
+    return f"{int(value)}" if pd.notna(value) else None
+
+
 def render_station_detail(selected_row, use_time):
-    subsidy_ev = selected_row.get('max_subsidy_ev')
-    subsidy_mini = selected_row.get('max_subsidy_mini')
+    subsidy_ev = _format_subsidy(selected_row.get('max_subsidy_ev'))
+    subsidy_mini = _format_subsidy(selected_row.get('max_subsidy_mini'))
     with st.expander("📍 선택된 충전소 상세정보", expanded=True):
         st.markdown(f"""
         <div style="background-color:#f9f9f9; padding:16px; border-radius:8px; border:1px solid #ddd;">
@@ -110,7 +302,6 @@ def render_station_detail(selected_row, use_time):
         """, unsafe_allow_html=True)
 
 def generate_summary(df):
-    df = df.copy()
     df = df.dropna(subset=['latitude', 'longitude'])
 
     summary = (
@@ -120,10 +311,9 @@ def generate_summary(df):
             'region_name': 'first',
             'district_name': 'first',
             'short_address': 'first',
+            'display_name': 'first',
             'latitude': 'first',
             'longitude': 'first',
-            'max_subsidy_ev': 'first',
-            'max_subsidy_mini': 'first',
             'charger_local_id': 'count',
             'charger_type': lambda x: ', '.join(sorted(set(x))),
             'capacity': lambda x: ', '.join(sorted(set(x)))
@@ -134,18 +324,30 @@ def generate_summary(df):
         })
     )
     summary['station_id'] = summary['station_id'].astype(int)
-    return summary
+    # 💰 보조금은 시/도·구/군 표에서 조인
+    return attach_subsidy(summary)
 
 
 def get_map_center(summary, clicked_station_id):
+    # 1. 선택된 충전소 (좌표가 있을 때)
     if clicked_station_id:
         selected_row = summary[summary['station_id'] == clicked_station_id]
         if not selected_row.empty:
-            return selected_row.iloc[0]['latitude'], selected_row.iloc[0]['longitude']
-    return summary['latitude'].mean(), summary['longitude'].mean()
+            lat, lon = selected_row.iloc[0]['latitude'], selected_row.iloc[0]['longitude']
+            if not pd.isna(lat) and not pd.isna(lon):
+                return lat, lon
+
+    # 2. 범위 전체 평균 좌표 (NaN 제외) - 페이지를 넘겨도 지도가 움직이지 않는다
+    latitudes = summary['latitude'].dropna()
+    longitudes = summary['longitude'].dropna()
+    if not latitudes.empty and not longitudes.empty:
+        return latitudes.mean(), longitudes.mean()
+
+    # 3. fallback: 대한민국 중앙 좌표
+    return 36.5, 127.9
 
 def render_station_cards(summary, start_idx, end_idx):
-    visible_rows = summary.iloc[start_idx:end_idx].copy()
+    visible_rows = summary.iloc[start_idx:end_idx]
     cols = st.columns(3)
     for idx, row in enumerate(visible_rows.itertuples(index=False)):
         sid = row.station_id
@@ -156,12 +358,8 @@ def render_station_cards(summary, start_idx, end_idx):
         types = row.charger_types
         caps = row.capacities
 
-        cleaned_name = name.replace(" ", "")
-        if not any(cleaned_name.endswith(suffix) for suffix in ["시청", "구청"]):
-            for prefix in [district.replace(" ", ""), district.replace("시", "").replace("군", "").replace("구", "")]:
-                if cleaned_name.startswith(prefix):
-                    cleaned_name = cleaned_name[len(prefix):]
-        cleaned_name = cleaned_name.strip()
+        # 수집 시점에 만든 display_name 사용 (예전 요약 캐시면 그 자리에서 계산)
+        cleaned_name = getattr(row, 'display_name', None) or make_display_name(name, district)
         is_selected = sid == st.session_state.get("clicked_station_id")
 
         with cols[idx % 3]:
@@ -190,22 +388,90 @@ def render_station_cards(summary, start_idx, end_idx):
                     🔋 <b>용량:</b> <span style='color:#009900'>{caps}</span>
                 </div>
                 ''', unsafe_allow_html=True)
-                if st.form_submit_button("🔍 위치 보기", use_container_width=True):
-                    st.session_state.clicked_station_id = sid
-                    st.rerun()
+                # 콜백으로 상태만 바꾸고, 다시 그릴 범위는 감싸고 있는 프래그먼트가 정한다
+                st.form_submit_button(
+                    "🔍 위치 보기",
+                    use_container_width=True,
+                    on_click=_select_station,
+                    args=(sid,)
+                )
+
+
+# 🔎 전국 충전소 검색 → 해당 시/도·구/군, 카드 페이지, 지도 선택으로 바로 이동
+CARDS_PER_PAGE = 9
+
+
+def _jump_to_station(region, district, station_id):
+    # 충전소 데이터와 시/도·구/군 목록의 표기(끝 공백 등)가 다를 수 있어 목록 값으로 맞춘다
+    region = next((r for r in get_region_list() if str(r).strip() == str(region).strip()), region)
+    district_list = get_sorted_district_list(region, *get_region_center(region))
+    district = next((d for d in district_list if str(d).strip() == str(district).strip()), district)
+
+    st.session_state.last_region = region
+    st.session_state.last_district = district
+    # 선택 상자 상태를 지우면 다음 실행에서 last_region/last_district 를 기본값으로 다시 만든다
+    st.session_state.pop("region_selectbox_3col", None)
+    st.session_state.pop("district_selectbox_3col", None)
+
+    summary = load_or_generate_summary(region, district)
+    positions = np.flatnonzero(summary['station_id'].to_numpy() == station_id)
+    st.session_state.page = int(positions[0]) // CARDS_PER_PAGE if len(positions) else 0
+    st.session_state.clicked_station_id = station_id
+    st.session_state.search_jump_pending = True
+
+
+@timed_fragment("검색")
+def render_station_search():
+    """
+    타이핑 검색창. 입력이 바뀌면 이 프래그먼트만 다시 실행되고,
+    결과를 고르면 전체 화면을 다시 실행해 해당 충전소로 이동한다.
+    """
+    if st.session_state.pop("search_jump_pending", False):
+        st.rerun()
+
+    query = st.text_input(
+        "🔎 충전소·주소 검색 (전국)",
+        key="station_search_query",
+        placeholder="예: 논산시청, 대전 휴게소, ㄴㅅㅅㅊ"
+    )
+    if not query.strip():
+        return
+
+    with st.spinner("전국 검색 색인 준비 중..."):
+        index = get_station_search_index()
+    start = time.perf_counter()
+    results = search_stations(index, query)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    record_timing("검색 색인 조회", elapsed_ms)
+
+    st.caption(f"검색 결과 {len(results)}건 · {elapsed_ms:.1f} ms")
+    for i, row in enumerate(results.itertuples(index=False)):
+        st.button(
+            f"{row.station_name} · {row.region_name} {row.district_name} · {row.clean_address}",
+            key=f"search_hit_{i}",
+            on_click=_jump_to_station,
+            args=(row.region_name, row.district_name, row.station_id),
+            use_container_width=True
+        )
+
+
+def _select_station(station_id):
+    st.session_state.clicked_station_id = station_id
+
+
+def _move_page(delta, total_pages):
+    # 선택은 유지 - 페이지만 바뀌면 카드 프래그먼트만 다시 실행되고 지도는 그대로 둔다
+    new_page = st.session_state.page + delta
+    if 0 <= new_page < total_pages:
+        st.session_state.page = new_page
+
 
 def render_pagination_controls(total_pages):
     prev, mid, next = st.columns([1, 4, 1])
     with prev:
-        if st.button("⬅ 이전") and st.session_state.page > 0:
-            st.session_state.page -= 1
-            st.session_state.clicked_station_id = None
-            st.rerun()
+        st.button("⬅ 이전", on_click=_move_page, args=(-1, total_pages))
     with next:
-        if st.button("다음 ➡") and st.session_state.page < total_pages - 1:
-            st.session_state.page += 1
-            st.session_state.clicked_station_id = None
-            st.rerun()
+        st.button("다음 ➡", on_click=_move_page, args=(1, total_pages))
     with mid:
         st.markdown(f"<div style='text-align:center;'>📄 페이지 {st.session_state.page + 1} / {total_pages}</div>", unsafe_allow_html=True)
 
@@ -218,6 +484,12 @@ def extract_kw_from_text(text):
     except:
         return None
 
+
+def capacity_kw_series(capacity):
+    # 용량 문자열 종류는 몇 개뿐 - 고유값만 파싱해서 매핑
+    capacity = capacity.astype(str)
+    return capacity.map({c: extract_kw_from_text(c) for c in capacity.unique()}).astype(float)
+
 # 🔹 1. 충전기 종류 필터 함수
 def render_type_filter(df):
     selected_types = []
@@ -257,11 +529,9 @@ def render_type_filter(df):
 
 # 🔹 2. 용량 필터 함수
 def render_capacity_filter(df, selected_types):
-    df = df.copy()
-
-    # ⚡ 충전용량 추출
+    # ⚡ 충전용량 추출 (공유 프레임은 건드리지 않고 파생 프레임에 컬럼 추가)
     if 'capacity_kw' not in df.columns:
-        df['capacity_kw'] = df['capacity'].apply(extract_kw_from_text)
+        df = df.assign(capacity_kw=capacity_kw_series(df['capacity']))
 
     # 🔍 충전기 종류 필터링
     if selected_types:
@@ -343,13 +613,106 @@ def render_capacity_filter(df, selected_types):
     return filtered_kw_list
 
 
+# 🔹 운영 시간 필터 (지금 / 지정 시각에 운영 중인 충전소)
+HOURS_FILTER_MODES = ["전체", "지금 운영 중", "지정 시각"]
+
+
+def render_hours_filter():
+    """
+    반환: (주간 분 또는 None(필터 없음), 운영 시간 정보 없는 충전소 포함 여부)
+    """
+    with st.expander("⏰ 운영 시간", expanded=False):
+        mode = st.radio("운영 시간", HOURS_FILTER_MODES, horizontal=True,
+                        key="filter_hours_mode", label_visibility="collapsed")
+        if mode == "전체":
+            return None, True
+
+        now = datetime.now(KST)
+        if mode == "지금 운영 중":
+            minute = week_minute(now)
+            st.caption(f"기준: {WEEKDAY_NAMES[now.weekday()]}요일 {now:%H:%M}")
+        else:
+            col_day, col_time = st.columns(2)
+            day = col_day.selectbox("요일", range(7), index=now.weekday(), key="filter_hours_day",
+                                    format_func=lambda d: f"{WEEKDAY_NAMES[d]}요일")
+            at = col_time.time_input("시각", value=now.time().replace(second=0, microsecond=0),
+                                     step=1800, key="filter_hours_time")
+            minute = day * DAY_MINUTES + at.hour * 60 + at.minute
+
+        include_unknown = st.checkbox("운영 시간 정보가 없는 충전소 포함", value=True,
+                                      key="filter_hours_unknown")
+    return minute, include_unknown
+
+
+# 🔹 3. 종류/용량/운영 시간 필터 (행 단위 apply 없이 마스크로 처리)
+def filter_charger_mask(df, selected_types, selected_caps, open_at=None, include_unknown=True):
+    """
+    조건에 맞는 행의 불리언 마스크 (numpy).
+    open_at: 주간 분 (hours_utils.week_minute) - 주어지면 그 시각에 운영 중인 충전소만 남긴다.
+    """
+    mask = np.ones(len(df), dtype=bool)
+
+    if selected_types:
+        # '+' 로 구분된 종류 문자열에서 정확히 일치하는 토큰만 매칭
+        pattern = r'(?:^|\+)(?:' + '|'.join(re.escape(t) for t in selected_types) + r')(?:\+|$)'
+        mask &= df['charger_type'].astype(str).str.contains(pattern, regex=True, na=False).to_numpy()
+
+    if selected_caps:
+        if 'capacity_kw' in df.columns:
+            capacity_kw = df['capacity_kw']
+        else:
+            capacity_kw = capacity_kw_series(df['capacity'])
+        mask &= capacity_kw.isin(selected_caps).to_numpy()
+
+    if open_at is not None:
+        # 운영 시간은 미리 파싱된 구간 표와 정수 비교만 한다
+        mask &= np.asarray(open_mask(df['station_id'].to_numpy(), get_station_hours(), open_at, include_unknown))
+
+    return mask
+
+
+def filter_charger_rows(df, selected_types, selected_caps, open_at=None, include_unknown=True):
+    return df[filter_charger_mask(df, selected_types, selected_caps, open_at, include_unknown)]
+
+
+# 📑 충전소 키(정규화된 이름) 기준 정렬 + 충전소별 시작 위치
+def build_station_page_index(df, mask):
+    """
+    필터를 통과한 행의 위치(positions)를 충전소 키 순으로 한 번만 정렬해 두고,
+    페이지 조회 시에는 해당 페이지 충전소의 위치 구간만 잘라 df 에서 꺼낸다.
+    프레임을 복사해 두지 않으므로 세션마다 위치 배열만 남는다.
+    """
+    # station_name 은 수집 시점에 이미 정규화되어 있음
+    names = df['station_name']
+    positions = np.flatnonzero(mask & names.notna().to_numpy())
+    keys = names.to_numpy()[positions].astype(str)
+    order = np.argsort(keys, kind='stable')
+    positions, keys = positions[order], keys[order]
+
+    if len(keys):
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    else:
+        starts = np.array([], dtype=int)
+    starts = np.append(starts, len(keys))
+
+    return {"positions": positions, "starts": starts}
+
+
+def get_station_page(df, page_index, page, items_per_page):
+    starts = page_index["starts"]
+    total_items = len(starts) - 1
+    first = min((page - 1) * items_per_page, total_items)
+    last = min(first + items_per_page, total_items)
+    return df.iloc[page_index["positions"][starts[first]:starts[last]]], total_items
+
+
 #필터링 -> starion_list 압축
 def summarize_station_rows(df):
     if df.empty:
         return df
 
-    df['capacity_kw'] = df['capacity'].apply(extract_kw_from_text)
-    df['station_name'] = df['station_name'].apply(normalize_station_name)
+    # station_name 정규화/주소 정리는 수집 시점(normalize_station_frame)에 끝나 있음
+    df = df.assign(capacity_kw=capacity_kw_series(df['capacity']))
 
     def summarize_group(group):
         name = group['station_name'].iloc[0]
@@ -382,6 +745,49 @@ def summarize_station_rows(df):
 
 
 
+# 🆚 구/군 비교 - 여러 구/군이 섞인 프레임을 구/군별로 한 번에 집계
+FAST_CHARGER_KW = 50  # 이 용량 이상을 급속으로 본다
+
+
+def compare_districts(df):
+    """
+    district_name 별 충전소 수, 충전기 수, 급속 비율, 평균 용량, 충전소당 충전기 수, 보조금을 한 표로.
+    구/군 수와 상관없이 groupby 한 번 + 보조금 조인 한 번.
+    """
+    capacity_kw = capacity_kw_series(df["capacity"])
+    frame = pd.DataFrame({
+        "region_name": df["region_name"].astype(str).str.strip(),
+        "district_name": df["district_name"].astype(str).str.strip(),
+        "station_id": df["station_id"],
+        "capacity_kw": capacity_kw,
+        "fast": capacity_kw >= FAST_CHARGER_KW,
+    })
+    table = frame.groupby(["region_name", "district_name"], sort=False).agg(**{
+        "충전소 수": ("station_id", "nunique"),
+        "충전기 수": ("station_id", "size"),
+        "급속 충전기": ("fast", "sum"),
+        "평균 용량(kW)": ("capacity_kw", "mean"),
+    }).reset_index()
+    table["급속 비율(%)"] = (table["급속 충전기"] / table["충전기 수"] * 100).round(1)
+    table["충전소당 충전기"] = (table["충전기 수"] / table["충전소 수"]).round(2)
+    table["평균 용량(kW)"] = table["평균 용량(kW)"].round(1)
+
+    # 💰 보조금은 시/도·구/군 표에서 조인
+    return attach_subsidy(table).rename(columns={
+        "max_subsidy_ev": "승용차 보조금(만원)", "max_subsidy_mini": "소형차 보조금(만원)",
+    })
+
+
+def compare_district_shares(df, column):
+    """
+    구/군(행) × column 값(열) 충전기 비율(%) 표 - crosstab 한 번.
+    """
+    shares = pd.crosstab(
+        df["district_name"].astype(str).str.strip(), df[column].astype(str), normalize="index"
+    )
+    return (shares * 100).round(1)
+
+
 def render_station_expanders(df):
     for _, row in df.iterrows():
         # 🔢 충전기 타입 목록 및 개수 추출
@@ -639,21 +1045,28 @@ def Legend_Customization():
 </div>
 """, unsafe_allow_html=True)
 
-@st.cache_data(ttl=3600)
+@serve_stale()
+@st.cache_resource(ttl=3600)
 def load_or_generate_summary(region, district):
-    os.makedirs("cache", exist_ok=True)
-
     # ✅ 안전한 파일 이름 처리
     safe_region = region.replace(" ", "_")
     safe_district = district.replace(" ", "_")
-    path = f"cache/summary_{safe_region}_{safe_district}.parquet"
-
-    if os.path.exists(path):
-        return pd.read_parquet(path)
-
-    # → 요약 생성
-    df = get_station_data(region, district)
-    summary = generate_summary(df)
-
-    summary.to_parquet(path)
-    return summary
+    cache_name = f"summary_{safe_region}_{safe_district}.parquet"
+
+    # → 없으면 요약 생성 (여러 프로세스 중 하나만 생성)
+    def build():
+        df = get_station_data(region, district)
+        summary = generate_summary(df)
+        # DB 장애 중 대체 데이터(스냅샷에서 잘라 쓴 범위, 마지막 보조금 표)로 만든 요약은 파일/캐시에 남기지 않음
+        stale_source = next((frame for frame in (df, get_subsidy_table()) if is_stale(frame)), None)
+        if stale_source is not None:
+            raise DatabaseUnavailable("대체 데이터로 만든 요약", stale=mark_freshness(summary, **stale_source.attrs["freshness"]))
+        return summary
+
+    summary = get_or_build_frame(
+        cache_name,
+        build,
+        meta={"kind": "summary", "region": region, "district": district}
+    )
+    summary = mark_freshness(summary, "cache", datetime.fromtimestamp(os.path.getmtime(cache_path(cache_name))).isoformat(timespec="seconds"))
+    return register_shared_frame(cache_path(cache_name), summary)
@@ -0,0 +1,200 @@
+# hours_utils.py
+# ⏰ 충전소 운영 시간 - 자유 텍스트(available_time)를 주간 분 단위 구간으로 한 번만 파싱
+#  - 한 주 = 월요일 00:00 부터 10080분, 구간은 [start, end) 정수 (int16)
+#  - '24시간', '평일 09:00~18:00 / 주말 10:00~17:00', '월~토 9시-22시 (일요일 휴무)', '22:00~06:00' 등
+#  - 파싱 결과는 cache/station_hours.parquet (충전소별 구간 행) 로 남기고,
+#    "지금 / 지정 시각 운영 중" 필터는 구간 비교만 한다 (조회 시점에는 텍스트를 보지 않음)
+import re
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+
+from cache_utils import cache_path, get_or_build_frame
+from db_utils import (
+    DB_BULK_TIMEOUT, read_sql, register_shared_frame, mark_freshness, serve_stale, _file_time
+)
+
+
+DAY_MINUTES = 24 * 60
+WEEK_MINUTES = 7 * DAY_MINUTES
+WEEKDAY_NAMES = "월화수목금토일"
+KST = timezone(timedelta(hours=9))  # 한국은 서머타임이 없어 고정 오프셋
+
+STATION_HOURS_NAME = "station_hours.parquet"
+STATION_HOURS_SQL = "SELECT DISTINCT station_id, available_time FROM chargers_generated"
+
+# kind: 구간 행의 종류
+HOURS_UNKNOWN, HOURS_ALWAYS, HOURS_SCHEDULED = 0, 1, 2
+
+_DAY_GROUPS = {
+    "평일": range(0, 5), "주중": range(0, 5), "주말": (5, 6),
+    "매일": range(7), "연중무휴": range(7), "상시": range(7),
+}
+_ALWAYS = re.compile(r"24\s*시간|상시|연중무휴|종일")
+_CLOSED = re.compile(r"휴무|휴관|휴일|미운영|운영\s*안\s*함|이용\s*불가")
+_DAY_RANGE = re.compile(r"([월화수목금토일])(?:요일)?\s*[~\-～∼]\s*([월화수목금토일])(?:요일)?")
+_SINGLE_DAY = re.compile(r"(?<![가-힣])([월화수목금토일])(?:요일)?(?![가-힣])|([월화수목금토일])요일")
+_CLOCK = r"(\d{1,2})\s*(?::\s*(\d{2})|시(?:\s*(\d{1,2})\s*분)?)"
+_TIME_RANGE = re.compile(_CLOCK + r"?\s*[~\-～∼]\s*" + _CLOCK)
+_SEGMENT_SPLIT = re.compile(r"[,/;\n|]|\)|\(")
+
+
+def _clock_minutes(hour, minute, minute_alt):
+    minutes = int(hour) * 60 + int(minute or minute_alt or 0)
+    return min(minutes, DAY_MINUTES)
+
+
+def _segment_days(segment):
+    days = set()
+    for word, group in _DAY_GROUPS.items():
+        if word in segment:
+            days.update(group)
+            segment = segment.replace(word, " ")
+    for start, end in _DAY_RANGE.findall(segment):
+        first, last = WEEKDAY_NAMES.index(start), WEEKDAY_NAMES.index(end)
+        days.update(d % 7 for d in range(first, last + (7 if last < first else 0) + 1))
+    segment = _DAY_RANGE.sub(" ", segment)
+    for short, long_form in _SINGLE_DAY.findall(segment):
+        days.add(WEEKDAY_NAMES.index(short or long_form))
+    return days
+
+
+def _merge(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(i) for i in merged]
+
+
+def parse_operating_hours(value):
+    """
+    운영 시간 텍스트 → 주간 구간 [(start, end), ...] (월요일 00:00 기준 분).
+    24시간이면 [(0, 10080)], 해석할 수 없으면 None.
+    """
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    intervals, closed = [], set()
+    carried_days = None  # '평일' 다음 조각에 시간만 오는 경우 앞 조각의 요일을 이어 씀
+    understood = False
+
+    for segment in _SEGMENT_SPLIT.split(str(value)):
+        segment = segment.strip()
+        if not segment:
+            continue
+        days = _segment_days(segment)
+        times = _TIME_RANGE.findall(segment)
+
+        if _CLOSED.search(segment) and not times:
+            closed.update(days)
+            understood = understood or bool(days)
+            continue
+        if not times and not _ALWAYS.search(segment):
+            carried_days = days or carried_days
+            continue
+
+        days = days or carried_days or set(range(7))
+        understood = True
+        if not times:  # 24시간
+            intervals += [(d * DAY_MINUTES, (d + 1) * DAY_MINUTES) for d in days]
+            continue
+        for h1, m1, m1_alt, h2, m2, m2_alt in times:
+            start, end = _clock_minutes(h1, m1, m1_alt), _clock_minutes(h2, m2, m2_alt)
+            for d in days:
+                base = d * DAY_MINUTES
+                if start == end:  # 00:00~00:00 → 하루 종일
+                    intervals.append((base, base + DAY_MINUTES))
+                elif start < end:
+                    intervals.append((base + start, base + end))
+                else:  # 자정을 넘는 구간은 다음 날로 나눈다 (일요일 밤 → 월요일 새벽)
+                    intervals.append((base + start, base + DAY_MINUTES))
+                    next_base = (d + 1) % 7 * DAY_MINUTES
+                    intervals.append((next_base, next_base + end))
+
+    if not understood:
+        return None
+    intervals = [(s, e) for s, e in intervals if s // DAY_MINUTES not in closed]
+    return _merge(intervals)
+
+
+def build_hours_table(raw):
+    """
+    (station_id, available_time) → 구간 표 (station_id: str, start/end: int16, kind: int8).
+    같은 텍스트는 한 번만 파싱한다. 해석 못 한 충전소는 kind=0 인 빈 구간 한 행.
+    """
+    raw = raw.drop_duplicates("station_id")
+    codes, texts = pd.factorize(raw["available_time"].astype(object).where(raw["available_time"].notna()))
+    parsed = [parse_operating_hours(t) for t in texts]
+
+    # 고유 텍스트별 구간 배열 → 충전소별로 펼친다 (repeat/gather 만 사용)
+    unknown = [(0, 0)]
+    per_text = [p if p else unknown for p in parsed] + [unknown]  # 마지막 = 값 없음(code -1)
+    kinds = np.array(
+        [HOURS_UNKNOWN if p is None else HOURS_ALWAYS if p == [(0, WEEK_MINUTES)] else HOURS_SCHEDULED
+         for p in parsed] + [HOURS_UNKNOWN], dtype=np.int8
+    )
+    lengths = np.array([len(p) for p in per_text])
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    flat = np.array([i for p in per_text for i in p], dtype=np.int32).reshape(-1, 2)
+
+    codes = np.where(codes < 0, len(parsed), codes)
+    counts = lengths[codes]
+    row_starts = np.repeat(np.cumsum(counts) - counts, counts)
+    gather = np.repeat(offsets[codes], counts) + (np.arange(counts.sum()) - row_starts)
+    return pd.DataFrame({
+        "station_id": np.repeat(raw["station_id"].astype(str).to_numpy(), counts),
+        "start": flat[gather, 0].astype(np.int16),
+        "end": flat[gather, 1].astype(np.int16),
+        "kind": np.repeat(kinds[codes], counts),
+    })
+
+
+def _empty_hours_table():
+    # DB 장애 중 첫 조회: 모든 충전소를 '정보 없음'으로
+    df = pd.DataFrame({
+        "station_id": pd.Series(dtype=object), "start": pd.Series(dtype=np.int16),
+        "end": pd.Series(dtype=np.int16), "kind": pd.Series(dtype=np.int8),
+    })
+    return mark_freshness(df, "stale", None, stale=True)
+
+
+@serve_stale(_empty_hours_table)
+@st.cache_resource(ttl=3600)
+def get_station_hours():
+    """
+    충전소별 주간 운영 구간 표 (cache/station_hours.parquet, 없으면 DB 에서 한 번 만든다).
+    """
+    def build():
+        raw = read_sql(text(STATION_HOURS_SQL), timeout=DB_BULK_TIMEOUT, allow_stale=False)
+        return build_hours_table(raw)
+
+    df = get_or_build_frame(STATION_HOURS_NAME, build, meta={"kind": "hours"})
+    df = mark_freshness(df, "cache", _file_time(cache_path(STATION_HOURS_NAME)))
+    return register_shared_frame(cache_path(STATION_HOURS_NAME), df)
+
+
+def week_minute(when=None):
+    """when(기본: 지금, 한국 시간)의 주간 분 (월요일 00:00 = 0)"""
+    when = when or datetime.now(KST)
+    return when.weekday() * DAY_MINUTES + when.hour * 60 + when.minute
+
+
+def open_mask(station_ids, hours, minute, include_unknown=True):
+    """
+    station_ids(충전기 행) 중 minute(주간 분)에 운영 중인 행의 불리언 배열.
+    구간 비교는 구간 표 전체에 한 번, 결과는 고유 충전소 단위로 다시 펼친다.
+    """
+    in_range = (hours["start"].to_numpy() <= minute) & (minute < hours["end"].to_numpy())
+    open_ids = hours["station_id"].to_numpy()[in_range]
+    codes, uniques = pd.factorize(station_ids)
+    keys = pd.Index(uniques.astype(str))
+    allowed = keys.isin(open_ids)
+    if include_unknown:
+        known = hours["station_id"].to_numpy()[hours["kind"].to_numpy() != HOURS_UNKNOWN]
+        allowed |= ~keys.isin(known)
+    return np.append(allowed, include_unknown)[codes]  # code -1(값 없음) → 마지막 값
@@ -0,0 +1,403 @@
+# migration_utils.py
+# 🛠️ DB 인덱스 / 구체화 테이블 마이그레이션 + 갱신 작업 + 조회 지연 벤치마크
+#  - 앱이 읽는 뷰(station_charger_with_subsidy, station_charger_view)를 같은 이름의 테이블로 구체화한다
+#    원래 뷰는 {이름}__src 로 남기고, 테이블에는 db_utils 조회 패턴에 맞춘 커버링 인덱스를 붙인다
+#    → db_utils 쿼리는 그대로 두고, 뷰를 매번 계산하는 대신 인덱스를 탄다
+#  - 이미 테이블인 것(chargers_generated)은 빠진 인덱스만 추가
+#  - 갱신: __src 뷰에서 새 테이블을 끝까지 만든 뒤 이름을 한 번에 바꿔 끼운다 (읽는 쪽은 항상 완전한 테이블)
+#    ⚠️ 구체화한 뒤에는 앱이 읽는 행이 마지막 갱신 시점 기준이다 → 정기 동기화(sync_utils.sync_cached_datasets)가
+#    매번 먼저 갱신하므로, 앱 데이터는 동기화 주기만큼 늦을 수 있다 (cache/ 파일과 같은 기준)
+#  - 로컬 대역(SQLite, cache/standin.sqlite)에서도 같은 마이그레이션/갱신/벤치마크를 돌릴 수 있다
+#  사용: python migration_utils.py standin|migrate|refresh|bench [--standin] ...
+import argparse
+import json
+import logging
+import os
+import re
+import statistics
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, create_engine, event, text
+
+from cache_utils import cache_path, file_lock, map_arrow
+from db_utils import (
+    engine, STATION_COLUMNS, STATION_SELECT, NATIONWIDE_SNAPSHOT_NAME,
+    REGION_LIST_SQL, DISTRICT_LIST_SQL, USE_TIME_SQL, build_charger_count_query,
+)
+
+logger = logging.getLogger(__name__)
+
+SOURCE_SUFFIX = "__src"          # 구체화한 테이블의 원본 뷰 이름 = 테이블 이름 + SOURCE_SUFFIX
+INDEX_PREFIX_CHARS = 64          # MySQL TEXT 컬럼은 앞부분 길이로만 색인할 수 있다
+MIGRATION_LOCK_PATH = cache_path("migration.lock")
+BENCH_REPORT_PATH = cache_path("migration_bench.json")
+STANDIN_PATH = cache_path("standin.sqlite")
+STANDIN_ROWS = 300_000           # 전국 스냅샷이 없을 때 만드는 합성 행 수
+
+# 관계별 (인덱스 이름, 컬럼) - 각 인덱스가 받쳐 주는 db_utils 함수
+MANAGED_RELATIONS = {
+    "station_charger_with_subsidy": [
+        # get_station_data, get_districts_station_data, iter_station_batches
+        ("ix_scws_scope", ("region_name", "district_name", "station_id")),
+        # get_station_rows, get_station_row_hashes (증분 동기화)
+        ("ix_scws_station", ("station_id", "charger_local_id")),
+        # get_charger_counts - 범위 조건 + GROUP BY 컬럼 + 세는 컬럼까지 인덱스 안에서 끝남
+        ("ix_scws_counts", ("region_name", "district_name", "capacity", "charger_type",
+                            "facility_major", "charger_local_id")),
+    ],
+    "station_charger_view": [
+        # get_region_list, get_district_list
+        ("ix_scv_region_district", ("region_name", "district_name")),
+    ],
+    "chargers_generated": [
+        # get_use_time_by_station_id
+        ("ix_cg_station_time", ("station_id", "available_time")),
+    ],
+}
+
+# 적용 순서 = 갱신 순서 (다른 뷰가 station_charger_with_subsidy 를 참조해도 먼저 새로 만들어진다)
+MIGRATIONS = [
+    ("001_station_charger_with_subsidy", "station_charger_with_subsidy"),
+    ("002_station_charger_view", "station_charger_view"),
+    ("003_chargers_generated", "chargers_generated"),
+]
+
+
+def get_standin_engine(path=STANDIN_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)  # 새로 받은 저장소에는 cache/ 가 없다
+    standin = create_engine(f"sqlite:///{path}")
+
+    # pysqlite 는 DDL 앞에서 트랜잭션을 열지 않는다 → 직접 BEGIN 해서 교체 과정을 한 트랜잭션으로
+    @event.listens_for(standin, "connect")
+    def _disable_implicit_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(standin, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    return standin
+
+
+# 🔎 카탈로그 조회 (MySQL information_schema / SQLite sqlite_master)
+def _relation_type(conn, name):
+    if conn.dialect.name == "sqlite":
+        kind = conn.execute(
+            text("SELECT type FROM sqlite_master WHERE name = :name AND type IN ('table', 'view')"),
+            {"name": name}
+        ).scalar()
+    else:
+        kind = conn.execute(text("""
+            SELECT TABLE_TYPE FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :name
+        """), {"name": name}).scalar()
+    if kind is None:
+        return None
+    return "view" if "view" in kind.lower() else "table"
+
+
+def _index_names(conn, table):
+    if conn.dialect.name == "sqlite":
+        query = text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table")
+    else:
+        query = text("""
+            SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table
+        """)
+    return {row[0] for row in conn.execute(query, {"table": table})}
+
+
+def _index_columns_sql(conn, table, columns):
+    if conn.dialect.name == "sqlite":
+        return ", ".join(columns)
+    types = dict(conn.execute(text("""
+        SELECT COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table
+    """), {"table": table}).all())
+    return ", ".join(
+        f"{c}({INDEX_PREFIX_CHARS})" if types.get(c, "").lower().endswith(("text", "blob")) else c
+        for c in columns
+    )
+
+
+def _create_indexes(conn, table, indexes):
+    for index_name, columns in indexes:
+        conn.execute(text(f"CREATE INDEX {index_name} ON {table} ({_index_columns_sql(conn, table, columns)})"))
+
+
+# 🧱 구체화: source 에서 {name}__new 를 다 만든 뒤 name 자리에 바꿔 끼운다
+def _build_and_swap(conn, name, source):
+    new, old = f"{name}__new", f"{name}__old"
+    indexes = MANAGED_RELATIONS[name]
+    current = _relation_type(conn, name)
+
+    conn.execute(text(f"DROP TABLE IF EXISTS {new}"))
+    conn.execute(text(f"CREATE TABLE {new} AS SELECT * FROM {source}"))
+    rows = conn.execute(text(f"SELECT COUNT(*) FROM {new}")).scalar()
+
+    if conn.dialect.name == "sqlite":
+        # SQLite: 뷰는 이름을 바꿀 수 없어 정의를 옮겨 다시 만들고,
+        # 인덱스 이름이 DB 전체에서 유일해야 하므로 교체한 뒤에 만든다 (트랜잭션 안이라 읽는 쪽은 이전 상태를 봄)
+        if current == "view":
+            view_sql = conn.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'view' AND name = :name"), {"name": name}
+            ).scalar()
+            select_sql = re.match(r"CREATE\s+VIEW\s+\S+\s+AS\s+(.*)", view_sql, re.S | re.I).group(1)
+            conn.execute(text(f"DROP VIEW {name}"))
+            conn.execute(text(f"CREATE VIEW {name}{SOURCE_SUFFIX} AS {select_sql}"))
+        else:
+            conn.execute(text(f"DROP TABLE {name}"))
+        conn.execute(text(f"ALTER TABLE {new} RENAME TO {name}"))
+        _create_indexes(conn, name, indexes)
+        return rows
+
+    # MySQL: 인덱스까지 만든 뒤 RENAME TABLE 한 문장으로 원자적 교체
+    _create_indexes(conn, new, indexes)
+    if current == "view":
+        conn.execute(text(f"RENAME TABLE {name} TO {name}{SOURCE_SUFFIX}, {new} TO {name}"))
+    else:
+        conn.execute(text(f"RENAME TABLE {name} TO {old}, {new} TO {name}"))
+        conn.execute(text(f"DROP TABLE {old}"))
+    return rows
+
+
+def _prepare_relation(conn, name):
+    # 마이그레이션 한 단계: 뷰면 구체화, 테이블이면 빠진 인덱스만 추가. 반환: 기록용 메모
+    kind = _relation_type(conn, name)
+    if kind is None:
+        raise RuntimeError(f"DB 에 {name} 이(가) 없습니다")
+    if kind == "view":
+        return f"구체화 {_build_and_swap(conn, name, source=name)}행"
+    existing = _index_names(conn, name)
+    missing = [index for index in MANAGED_RELATIONS[name] if index[0] not in existing]
+    _create_indexes(conn, name, missing)
+    return f"인덱스 {len(missing)}개 추가"
+
+
+def _ensure_bookkeeping(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            id VARCHAR(100) PRIMARY KEY, applied_at VARCHAR(32) NOT NULL, note VARCHAR(255)
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS materialized_refresh_log (
+            table_name VARCHAR(100) PRIMARY KEY, refreshed_at VARCHAR(32) NOT NULL,
+            row_count BIGINT, seconds DOUBLE
+        )
+    """))
+
+
+def get_applied_migrations(target_engine=engine):
+    with target_engine.begin() as conn:
+        _ensure_bookkeeping(conn)
+        return {row[0] for row in conn.execute(text("SELECT id FROM schema_migrations"))}
+
+
+def apply_migrations(target_engine=engine):
+    """
+    아직 적용하지 않은 마이그레이션을 순서대로 적용한다. 반환: [{id, note, seconds}]
+    """
+    report = []
+    with file_lock(MIGRATION_LOCK_PATH, timeout=3600):
+        applied = get_applied_migrations(target_engine)
+        for migration_id, relation in MIGRATIONS:
+            if migration_id in applied:
+                continue
+            start = time.perf_counter()
+            with target_engine.begin() as conn:
+                note = _prepare_relation(conn, relation)
+                conn.execute(text("INSERT INTO schema_migrations (id, applied_at, note) VALUES (:id, :at, :note)"), {
+                    "id": migration_id, "at": datetime.now().isoformat(timespec="seconds"), "note": note,
+                })
+            report.append({"id": migration_id, "note": note, "seconds": round(time.perf_counter() - start, 2)})
+            logger.info("마이그레이션 적용: %s", report[-1])
+    return report
+
+
+def refresh_materialized_tables(target_engine=engine):
+    """
+    구체화한 테이블을 원본 뷰(__src)에서 다시 만들어 교체한다 (정기 실행). 반환: [{table, rows, seconds}]
+    """
+    report = []
+    with file_lock(MIGRATION_LOCK_PATH, timeout=3600):
+        for _, name in MIGRATIONS:
+            with target_engine.begin() as conn:
+                if _relation_type(conn, f"{name}{SOURCE_SUFFIX}") != "view":
+                    continue  # 구체화하지 않은 관계 (원래 테이블)
+                start = time.perf_counter()
+                rows = _build_and_swap(conn, name, source=f"{name}{SOURCE_SUFFIX}")
+                seconds = round(time.perf_counter() - start, 2)
+                conn.execute(text("""
+                    REPLACE INTO materialized_refresh_log (table_name, refreshed_at, row_count, seconds)
+                    VALUES (:name, :at, :rows, :seconds)
+                """), {"name": name, "at": datetime.now().isoformat(timespec="seconds"), "rows": rows, "seconds": seconds})
+            report.append({"table": name, "rows": rows, "seconds": seconds})
+            logger.info("구체화 테이블 갱신: %s", report[-1])
+    return report
+
+
+# 🧪 로컬 대역 (SQLite) - MySQL 없이 마이그레이션/벤치마크 확인용
+def _synthetic_station_rows(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    regions = [f"시도{i:02d}" for i in range(17)]
+    station_count = max(rows // 3, 1)
+    station_id = rng.integers(1, station_count + 1, rows)
+    region = np.array(regions)[station_id % len(regions)]
+    district = np.char.add(region, np.char.add(" 구", (station_id // len(regions) % 15).astype(str)))
+    return pd.DataFrame({
+        "station_id": station_id,
+        "station_name": np.char.add("충전소", station_id.astype(str)),
+        "region_name": region,
+        "district_name": district,
+        "address": np.char.add(district, " 주소"),
+        "short_address": district,
+        "latitude": 33.5 + rng.random(rows) * 5,
+        "longitude": 126.0 + rng.random(rows) * 3.5,
+        "charger_local_id": np.arange(rows),
+        "charger_type": rng.choice(["DC콤보", "AC완속", "DC차데모", "AC3상"], rows),
+        "capacity": rng.choice(["7kW", "50kW", "100kW", "200kW"], rows),
+        "facility_major": rng.choice(["공공시설", "주거시설", "상업시설", "휴게시설"], rows),
+    })
+
+
+def build_standin(path=STANDIN_PATH, rows=STANDIN_ROWS):
+    """
+    앱과 같은 이름의 뷰/테이블을 가진 SQLite 대역을 새로 만든다.
+    전국 스냅샷이 있으면 그 행을, 없으면 rows 개 합성 행을 쓴다. 반환: 엔진
+    """
+    snapshot_path = cache_path(NATIONWIDE_SNAPSHOT_NAME)
+    try:
+        df = map_arrow(snapshot_path)[list(STATION_COLUMNS)]
+        df = df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.ArrowDtype)})
+    except (OSError, KeyError):
+        df = _synthetic_station_rows(rows)
+
+    standin = get_standin_engine(path)
+    columns = ", ".join(STATION_COLUMNS)
+    with standin.begin() as conn:
+        for name in ("station_charger_with_subsidy", "station_charger_view",
+                     *(f"{n}{SOURCE_SUFFIX}" for n in MANAGED_RELATIONS)):
+            conn.execute(text(f"DROP VIEW IF EXISTS {name}"))
+        for name in ("charger_rows", "chargers_generated", "station_charger_with_subsidy",
+                     "station_charger_view", "schema_migrations", "materialized_refresh_log"):
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+    df.to_sql("charger_rows", standin, index=False, chunksize=50_000)
+    df[["station_id", "charger_local_id"]].assign(available_time="24시간 이용가능").to_sql(
+        "chargers_generated", standin, index=False, chunksize=50_000
+    )
+    with standin.begin() as conn:
+        conn.execute(text(f"CREATE VIEW station_charger_with_subsidy AS SELECT {columns} FROM charger_rows"))
+        conn.execute(text(f"CREATE VIEW station_charger_view AS SELECT {columns} FROM charger_rows"))
+    logger.info("로컬 대역 생성: %s (%d행)", path, len(df))
+    return standin
+
+
+# ⏱️ 벤치마크 - db_utils 함수가 실제로 보내는 쿼리를 그대로 실행
+def _sample_scope(conn):
+    region, district = conn.execute(
+        text("SELECT region_name, district_name FROM station_charger_with_subsidy LIMIT 1")
+    ).first()
+    station_ids = [row[0] for row in conn.execute(
+        text("SELECT DISTINCT station_id FROM station_charger_with_subsidy WHERE region_name = :region LIMIT 200"),
+        {"region": region}
+    )]
+    return region, district, station_ids
+
+
+def _benchmark_queries(region, district, station_ids):
+    counts_query, counts_params = build_charger_count_query(["capacity"], region, district, False)
+    stations_query, stations_params = build_charger_count_query(["district_name"], region, None, True)
+    return {
+        "get_region_list": (text(REGION_LIST_SQL), {}),
+        "get_district_list": (text(DISTRICT_LIST_SQL), {"region": region}),
+        "get_station_data": (
+            text(STATION_SELECT + " WHERE region_name = :region AND district_name = :district"),
+            {"region": region, "district": district},
+        ),
+        "get_districts_station_data": (
+            text(STATION_SELECT + " WHERE region_name = :region AND district_name IN :districts")
+            .bindparams(bindparam("districts", expanding=True)),
+            {"region": region, "districts": [district]},
+        ),
+        "get_station_rows": (
+            text(STATION_SELECT + " WHERE station_id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": station_ids},
+        ),
+        "get_use_time_by_station_id": (text(USE_TIME_SQL), {"station_id": station_ids[0]}),
+        "get_charger_counts": (counts_query, counts_params),
+        "get_charger_counts(count_stations)": (stations_query, stations_params),
+    }
+
+
+def run_benchmarks(target_engine=engine, repeat=5):
+    """
+    함수별 쿼리 지연 중앙값(ms). 첫 실행은 캐시 예열로 보고 버린다.
+    """
+    with target_engine.connect() as conn:
+        queries = _benchmark_queries(*_sample_scope(conn))
+        results = {}
+        for name, (query, params) in queries.items():
+            pd.read_sql(query, conn, params=params)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                pd.read_sql(query, conn, params=params)
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = round(statistics.median(timings), 2)
+    return results
+
+
+def benchmark_migration(target_engine=engine, repeat=5):
+    """
+    마이그레이션 전/후 지연을 재고 cache/migration_bench.json 에 남긴다. 반환: 비교 표 (DataFrame)
+    이미 모두 적용된 DB 라면 '전' 값도 적용 후 값이다 (already_applied=True).
+    """
+    already_applied = {m for m, _ in MIGRATIONS} <= get_applied_migrations(target_engine)
+    before = run_benchmarks(target_engine, repeat)
+    migrations = apply_migrations(target_engine)
+    after = run_benchmarks(target_engine, repeat)
+
+    table = pd.DataFrame({"before_ms": before, "after_ms": after})
+    table["speedup"] = (table["before_ms"] / table["after_ms"]).round(1)
+    report = {
+        "measured_at": datetime.now().isoformat(timespec="seconds"),
+        "dialect": target_engine.dialect.name,
+        "already_applied": already_applied,
+        "migrations": migrations,
+        "results": table.reset_index(names="function").to_dict("records"),
+    }
+    with open(BENCH_REPORT_PATH, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return table
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="DB 인덱스/구체화 테이블 마이그레이션")
+    parser.add_argument("command", choices=["standin", "migrate", "refresh", "bench"],
+                        help="standin: 로컬 대역 생성 / migrate: 적용 / refresh: 구체화 테이블 갱신 / "
+                             "bench: 지연 측정 → 적용 → 다시 측정")
+    parser.add_argument("--standin", action="store_true", help="MySQL 대신 로컬 SQLite 대역에서 실행")
+    parser.add_argument("--rows", type=int, default=STANDIN_ROWS, help="대역 합성 행 수 (스냅샷이 없을 때)")
+    parser.add_argument("--repeat", type=int, default=5, help="벤치마크 반복 횟수")
+    parser.add_argument("--no-sync", action="store_true", help="refresh 때 캐시 증분 동기화 없이 구체화 테이블만 갱신")
+    args = parser.parse_args()
+
+    target = get_standin_engine() if args.standin else engine
+    if args.command == "standin":
+        build_standin(rows=args.rows)
+    elif args.command == "migrate":
+        print(json.dumps(apply_migrations(target), ensure_ascii=False, indent=2))
+    elif args.command == "refresh":
+        if args.standin or args.no_sync:
+            print(json.dumps(refresh_materialized_tables(target), ensure_ascii=False, indent=2))
+        else:
+            # 동기화가 구체화 테이블 갱신부터 하고 cache/ 파일까지 맞춘다
+            from sync_utils import sync_cached_datasets
+            print(json.dumps(sync_cached_datasets(), ensure_ascii=False, indent=2))
+    else:
+        print(benchmark_migration(target, args.repeat).to_string())
@@ -2,43 +2,24 @@
 # pages/1_충전소_현황.py
 import streamlit as st
 import pandas as pd
-import folium
-from folium.plugins import MarkerCluster
+import time
 from streamlit_folium import st_folium
-from db_utils import get_use_time_by_station_id
-from utils import get_marker_color, get_marker_icon
+from db_utils import get_use_time_by_station_id, data_version
+from utils import build_station_base_map, build_selection_layer
 from ev_ui_utils import (
     render_region_district_with_summary,
     render_station_detail,
     generate_summary,load_or_generate_summary,Legend_Customization,
     get_map_center,
     render_station_cards,
-    render_pagination_controls
+    render_pagination_controls,
+    record_timing, timed_section, timed_fragment, render_timing_report,
+    render_memory_report,
+    render_station_search, CARDS_PER_PAGE,
+    render_freshness_indicator, render_map_mode_selector
 )
 
 
-def get_map_center(summary_all, summary_visible, clicked_station_id):
-    # 1. 선택된 충전소가 있다면
-    if clicked_station_id:
-        row = summary_all[summary_all['station_id'] == clicked_station_id]
-        if not row.empty:
-            lat = row.iloc[0]['latitude']
-            lon = row.iloc[0]['longitude']
-            if not pd.isna(lat) and not pd.isna(lon):
-                return lat, lon
-
-    # 2. 현재 페이지에서 NaN 제외 후 평균 좌표 계산
-    latitudes = summary_visible['latitude'].dropna()
-    longitudes = summary_visible['longitude'].dropna()
-
-    if not latitudes.empty and not longitudes.empty:
-        return latitudes.mean(), longitudes.mean()
-
-    # 3. fallback: 대한민국 중앙 좌표
-    return 36.5, 127.9
-
-
-
 st.set_page_config(page_title="충전소 목록", layout="wide")
 st.title("⚡ 지역별 전기차 충전소 현황")
 
@@ -46,60 +27,11 @@ st.markdown("""
 <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.0/css/all.min.css">
 """, unsafe_allow_html=True)
 
-# ✅ 캐시된 지도 생성 함수
-@st.cache_data(ttl=60)
-def generate_map(df_all, summary_all, clicked_station_id, center_lat, center_lon):
-    visible_ids = summary_all['station_id'].tolist()
-    df = df_all[df_all['station_id'].isin(visible_ids)].copy()
-    df = df.drop_duplicates("station_id")
-    station_df = df.set_index("station_id")
-
-    # ✅ 조건부 zoom 적용
-    if clicked_station_id and not pd.isna(center_lat) and not pd.isna(center_lon):
-        m = folium.Map(location=[center_lat, center_lon], zoom_start=17)
-    else:
-        m = folium.Map(location=[center_lat, center_lon], zoom_start=13)  # 기본값
-        # zoom_start 생략해도 되지만 명시적으로 줘도 무방
-    cluster = MarkerCluster().add_to(m)
-    
-    bounds = []
-
-    for station_id in visible_ids:
-        if station_id not in station_df.index:
-            continue
-
-        row = station_df.loc[station_id]
-        if isinstance(row, pd.DataFrame):
-            row = row.iloc[0]
-
-        if pd.isna(row['latitude']) or pd.isna(row['longitude']):
-            continue
-
-        is_selected = (station_id == clicked_station_id)
-        type_string = f"{row['charger_type']}({row['capacity']}kW)"
-        color = get_marker_color(type_string)
-        icon = "star" if is_selected else get_marker_icon(type_string)
-
-        popup_html = f"""<div style='width:250px;'>
-            <b>📍 {row['station_name']}</b><br>
-            🔌 충전기 수: {row['charger_local_id']}<br>
-            ⚡ {row['capacity']}
-        </div>"""
-        popup = folium.Popup(folium.Html(popup_html, script=True), max_width=300)
-
-        marker = folium.Marker(
-            location=[row['latitude'], row['longitude']],
-            popup=popup,
-            tooltip=row['station_name'],
-            icon=folium.Icon(color=color, icon=icon, prefix="fa")
-        )
-        marker.add_to(cluster)
-        bounds.append([row['latitude'], row['longitude']])
-
-    
-    return m
-
 # 📍 필터 및 데이터 로딩
+script_start = time.perf_counter()
+
+# 🔎 전국 검색 - 결과를 고르면 아래 지역 선택/페이지/지도 선택이 해당 충전소로 맞춰진다
+render_station_search()
 
 # 1. 이전 상태 저장
 prev_region = st.session_state.get("last_region")
@@ -118,44 +50,79 @@ st.session_state.last_district = district
 
 # 5. 요약 데이터 생성
 summary = load_or_generate_summary(region, district)
+render_freshness_indicator(summary)
 
 
-# 🔢 페이지 계산
-cards_per_page = 9
-total_cards = len(summary)
-total_pages = (total_cards - 1) // cards_per_page + 1
-if "page" not in st.session_state:
-    st.session_state.page = 0
-start_idx = st.session_state.page * cards_per_page
-end_idx = start_idx + cards_per_page
-summary_visible = summary.iloc[start_idx:end_idx]
-
-# 지도 중심 위치 계산
-center_lat, center_lon = get_map_center(summary, summary_visible, st.session_state.get("clicked_station_id"))
+# 📍 지도 / 카드·페이지네이션 - 서로 따로 다시 실행되는 프래그먼트
+#  - 지도 줌 등 지도 이벤트 → 지도 프래그먼트만
+#  - 페이지 이동 → 카드 프래그먼트만 (지도 중심은 페이지가 아니라 범위 전체 기준이라 그대로)
+#  - 카드 선택 → 지도 강조·상세 패널이 함께 바뀌어야 하므로 전체 화면을 한 번 다시 실행
+@timed_fragment("지도")
+def render_map_panel(region, district, df, summary, map_mode):
+    clicked_station_id = st.session_state.get("clicked_station_id")
+    center_lat, center_lon = get_map_center(summary, clicked_station_id)
 
-# 📍 지도 + 카드 UI 출력
-col1, col2 = st.columns([1, 2])
-with col1:
     st.markdown("🗺️ **지도**")
-    m = generate_map(df, summary, st.session_state.get("clicked_station_id"), center_lat, center_lon)
-    clicked = st_folium(m, width=700, height=500, returned_objects=["zoom"])
+    # 기본 마커 레이어는 범위·데이터 버전별로 한 번만 생성, 선택/중심 이동은 작은 변경분만 전달
+    m = build_station_base_map(region, district, df, map_mode, data_version(df))
+    selection_layer = build_selection_layer(df, clicked_station_id)
+    zoom = 17 if clicked_station_id and not pd.isna(center_lat) and not pd.isna(center_lon) else 13
+    clicked = st_folium(
+        m,
+        key="station_map",
+        width=700,
+        height=500,
+        center=(float(center_lat), float(center_lon)),
+        zoom=zoom,
+        feature_group_to_add=selection_layer,
+        returned_objects=["zoom"]
+    )
     Legend_Customization()
+    # 카드 프래그먼트가 지도에 반영된 선택과 비교할 수 있게 기록
+    st.session_state.map_station_id = clicked_station_id
 
     if clicked and "zoom" in clicked:
         st.markdown(f"📏 현재 지도 확대 수준: <b>{clicked['zoom']}</b>", unsafe_allow_html=True)
-        
+
+
+@timed_fragment("카드 목록·페이지네이션")
+def render_card_panel(summary):
+    # 카드 선택 콜백 뒤에는 지도·상세 패널도 바뀌어야 하므로 전체 화면을 다시 실행
+    if st.session_state.get("clicked_station_id") != st.session_state.get("map_station_id"):
+        st.rerun()
+
+    # 🔢 페이지 계산
+    total_pages = (len(summary) - 1) // CARDS_PER_PAGE + 1
+    if "page" not in st.session_state:
+        st.session_state.page = 0
+    start_idx = st.session_state.page * CARDS_PER_PAGE
+    end_idx = start_idx + CARDS_PER_PAGE
+
+    st.markdown("### 📄 충전소 목록")
+    with timed_section("카드 목록"):
+        render_station_cards(summary, start_idx, end_idx)
+    with timed_section("페이지네이션"):
+        render_pagination_controls(total_pages)
+
+    render_timing_report()
+
+
+map_mode = render_map_mode_selector("station_status_map_mode")
+
+col1, col2 = st.columns([1, 2])
+with col1:
+    render_map_panel(region, district, df, summary, map_mode)
+
 with col2:
-    # 선택된 충전소 상세
-    if st.session_state.get("clicked_station_id"):
-        sid = st.session_state.clicked_station_id
-        filtered = summary[summary['station_id'] == sid]
+    # 선택된 충전소 상세 (선택이 바뀔 때는 전체 화면이 다시 실행되므로 프래그먼트 밖에 둔다)
+    clicked_station_id = st.session_state.get("clicked_station_id")
+    if clicked_station_id:
+        filtered = summary[summary['station_id'] == clicked_station_id]
         if not filtered.empty:
-            selected_row = filtered.iloc[0]
-            use_time = get_use_time_by_station_id(sid)
-            render_station_detail(selected_row, use_time)
+            use_time = get_use_time_by_station_id(clicked_station_id)
+            render_station_detail(filtered.iloc[0], use_time)
 
-    # 카드 및 페이지네이션
-    st.markdown("### 📄 충전소 목록")
-    render_station_cards(summary, start_idx, end_idx)
-    render_pagination_controls(total_pages)
+    render_card_panel(summary)
 
+render_memory_report()
+record_timing("전체 스크립트", (time.perf_counter() - script_start) * 1000)
@@ -1,17 +1,21 @@
 # pages/2_충전기_필터.py
 import streamlit as st
-from db_utils import get_region_list, get_district_list, get_station_data,clean_address_from_station_name,normalize_station_name
+from db_utils import get_region_list, get_district_list, get_station_data, data_version
 from ev_ui_utils import (
-    extract_kw_from_text,render_type_filter,render_capacity_filter,
-    summarize_station_rows,render_station_expanders,
-    render_station_html_details_g)
-import pandas as pd
-from ev_ui_utils import render_station_html_details
+    render_type_filter,render_capacity_filter,render_hours_filter,
+    summarize_station_rows,
+    render_station_html_details_g,
+    filter_charger_mask, build_station_page_index, get_station_page,
+    record_timing, timed_section, timed_fragment, render_timing_report,
+    render_memory_report, render_freshness_indicator, prefetch_nearby_districts)
+import time
 
 
 st.set_page_config(page_title="충전기 필터", layout="wide")
 st.title("🔍 충전기 필터")
 
+script_start = time.perf_counter()
+
 # 🔁 초기값 설정
 DEFAULT_REGION = "충청남도"
 DEFAULT_DISTRICT = "논산시 "
@@ -58,10 +62,15 @@ with col_district:
 # ✅ 지역 기반 데이터 가져오기
 df = get_station_data(region, district if district != "전체" else None)
 
+# 🔮 지금 선택에서 가까운 구/군들을 백그라운드로 미리 불러오기
+prefetch_nearby_districts(region, district, df, district_list)
+
 if df.empty:
     st.warning("선택된 지역에 충전소 데이터가 없습니다.")
     st.stop()
 
+render_freshness_indicator(df)
+
 # ✅ 전체 수 요약 (초기값)
 total_station_count = df['station_name'].nunique()
 total_charger_count = len(df)
@@ -71,200 +80,158 @@ st.markdown('------')
 
 
 
-if df.empty:
-    st.warning("선택된 지역에 충전소 데이터가 없습니다.")
-else:  
-    col1, col2 = st.columns([1.2, 2])
+# 🔁 필터 초기화 (콜백: 필터 프래그먼트만 다시 실행)
+def reset_filters():
+    for key in list(st.session_state.keys()):
+        if key.startswith(("chk_", "filter_cap_pills", "filter_hours_")):
+            del st.session_state[key]
+
+
+def set_current_page(page, total_pages):
+    if 1 <= page <= total_pages:
+        st.session_state.current_page = page
 
+
+def sync_page_input():
+    st.session_state.current_page = st.session_state.page_input
+
+
+# 🧩 필터 패널 / 결과 목록 - 서로 따로 다시 실행되는 프래그먼트
+#  - 페이지 이동 → 결과 목록 프래그먼트만 (필터링·정렬 인덱스는 session_state 에서 재사용)
+#  - 필터 조작 → 필터 프래그먼트에서 인덱스를 새로 만들고, 결과 목록도 바뀌어야 하므로 전체 화면을 한 번 다시 실행
+#    (지역 선택·데이터 로딩은 캐시에서 바로 나오고, 필터 프래그먼트는 같은 키라 인덱스를 다시 만들지 않는다)
+st.session_state.filter_full_run = True
+
+
+@timed_fragment("필터 패널")
+def render_filter_panel(region, district, df):
     # ✅ 필터 선택 UI
-    with col1:
-        selected_types = render_type_filter(df)
-        selected_caps = render_capacity_filter(df,selected_types)
+    selected_types = render_type_filter(df)
+    selected_caps = render_capacity_filter(df,selected_types)
+    open_at, include_unknown = render_hours_filter()
     # 🔁 필터 초기화 버튼
-        btn_cols = st.columns([3, 1.3])  # 왼쪽 공간 3, 오른쪽 버튼 1 비율
-        with btn_cols[1]:
-            if st.button("🔄 필터 초기화", key="filter_reset"):
-                for key in list(st.session_state.keys()):
-                    if key.startswith("chk_") or key.startswith("filter_cap_pills"):
-                        del st.session_state[key]
-                # _ = render_type_filter(df)
-                # _ = render_capacity_filter(df)
-                st.rerun()
-
-    
-        # ✅ 필터링 로직
-    filtered_df = df.copy()
-
-    if 'capacity_kw' not in filtered_df.columns:
-        filtered_df['capacity_kw'] = filtered_df['capacity'].apply(extract_kw_from_text)
-
-    if selected_types:
-        filtered_df = filtered_df[
-            filtered_df['charger_type'].apply(
-                lambda s: any(t in str(s).split('+') for t in selected_types)
-            )
-        ]
-
-    if selected_caps:
-        filtered_df = filtered_df[filtered_df['capacity_kw'].isin(selected_caps)]
-
-    # ✅ 주소 정리 및 요약
-    filtered_df['address'] = filtered_df.apply(clean_address_from_station_name, axis=1)
-    summarized_df = summarize_station_rows(filtered_df)
-    with col1:
-        filtered_station_count = len(summarized_df)
-        total_charger_count = len(filtered_df)
-        st.markdown("### 📊 필터링 결과 요약")
-        st.markdown(f"🔎 **필터링된 충전소 수:** <span style='color:#4CAF50;font-weight:bold'>{filtered_station_count}</span> 개", unsafe_allow_html=True)
-        st.markdown(f"🔋 **충전기 수 총합:** <span style='color:#4CAF50;font-weight:bold'>{total_charger_count}</span> 기", unsafe_allow_html=True)
-
-
-
-    # ✅ 결과 출력
-    # with col2:
-        
-    #     items_per_page = 10
-    #     total_items = len(summarized_df)
-    #     total_pages = (total_items - 1) // items_per_page + 1
-
-    #     # 🔁 컬럼명 한글로 변경
-    #     summarized_df = summarized_df.rename(columns={
-    #         'station_name': '장소',
-    #         'address': '주소',
-    #         'charger_types': '충전기 타입',
-    #         'capacities': '용량'
-    #     })
-        
-    #     # 갯수검증..
-    #     summarized_df = summarized_df.reset_index(drop=True)
-    #     summarized_df['장소'] = summarized_df.index.map(lambda i: f"{i+1}. {summarized_df.loc[i, '장소']}")
-
-    #     if 'current_page' not in st.session_state:
-    #         st.session_state.current_page = 1
-    #     start_idx = (st.session_state.current_page - 1) * items_per_page
-    #     end_idx = start_idx + items_per_page
-    #     paged_df = summarized_df.iloc[start_idx:end_idx]
-
-    #     # st.subheader("📋충전소 리스트")
-    #     # st.markdown(render_station_html_details(summarized_df), unsafe_allow_html=True)
-
-    #     st.subheader("📋충전소 리스트")
-    #     st.markdown(render_station_html_details_g(summarized_df), unsafe_allow_html=True)
-        
-    #     # 페이지네이션 UI
-    #     col_prev, col_page, col_next = st.columns([1, 2, 1])
-    #     with col_prev:
-    #         if st.button("⬅️ 이전"):
-    #             if st.session_state.current_page > 1:
-    #                 st.session_state.current_page -= 1
-    #                 st.rerun()
-    #     with col_page:
-    #         st.number_input("페이지", min_value=1, max_value=total_pages, key="current_page", format="%d")
-    #     with col_next:
-    #         if st.button("다음 ➡️"):
-    #             if st.session_state.current_page < total_pages:
-    #                 st.session_state.current_page += 1
-    #                 st.rerun()
-
-    with col2:
-        
-        if 'last_filter' not in st.session_state:
-            st.session_state.last_filter = (selected_types, selected_caps)
-
-        if (selected_types, selected_caps) != st.session_state.last_filter:
-            st.session_state.current_page = 1
-            st.session_state.last_filter = (selected_types, selected_caps)
-
-        items_per_page = 10
-        total_items = len(summarized_df)
-        total_pages = (total_items - 1) // items_per_page + 1
-
-        # 컬럼명 한글로 변경
-        summarized_df = summarized_df.rename(columns={
-            'station_name': '장소',
-            'address': '주소',
-            'charger_types': '충전기 타입',
-            'capacities': '용량'
-        }).reset_index(drop=True)
-
-        # 번호 붙이기
-        summarized_df['장소'] = summarized_df.index.map(lambda i: f"{i+1}. {summarized_df.loc[i, '장소']}")
-
-
-        # 현재 페이지 상태
-        if "current_page" not in st.session_state:
-            st.session_state.current_page = 1
-        current_page = st.session_state.current_page  # 로컬 변수 사용
-
-        # 페이지별 데이터 추출
-        start_idx = (current_page - 1) * items_per_page
-        end_idx = start_idx + items_per_page
-        paged_df = summarized_df.iloc[start_idx:end_idx]
-        force_collapse = True
-        # 리스트 출력
-        st.subheader(f"📋 충전소 리스트 (총 {total_items}개 중 {start_idx+1}~{min(end_idx, total_items)}번)")
-        # st.markdown(render_station_html_details_g(paged_df), unsafe_allow_html=True)
-        st.markdown(render_station_html_details_g(paged_df, force_collapse=force_collapse), unsafe_allow_html=True)
-        # # 페이지네이션 UI
-        # col_prev, col_info, col_next = st.columns([1, 2, 0.4])
-        # with col_prev:
-        #     if st.button("⬅️ 이전", key="prev_page"):
-        #         if current_page > 1:
-        #             st.session_state.current_page = current_page - 1
-        #             st.rerun()
-        # with col_info:
-        #     st.markdown(f"<div style='text-align: center; font-weight: bold; padding-top: 0.5rem;'>페이지 {current_page} / {total_pages}</div>", unsafe_allow_html=True)
-        # with col_next:
-        #     if st.button("다음 ➡️", key="next_page"):
-        #         if current_page < total_pages:
-        #             st.session_state.current_page = current_page + 1
-        #             st.rerun()
-
-        
-
-        # 페이지네이션 UI
-        col_prev, col_info, col_next = st.columns([1, 2, 0.6])
-
-        with col_prev:
-            if st.button("⬅️ 이전", key="prev_page"):
-                if current_page > 1:
-                    st.session_state.current_page = current_page - 1
-                    st.rerun()
-
-        with col_info:
-            # 스타일을 적용한 number_input
-            st.markdown(
-                """
-                <style>
-                div[data-testid="stNumberInput"] {
-                    width: 100px;
-                    margin: 0 auto;
-                }
-                </style>
-                """,
-                unsafe_allow_html=True
-            )
-
-            page_input = st.number_input(
-                " ",  # 라벨을 공백으로 해서 공간 절약
-                min_value=1,
-                max_value=total_pages,
-                value=current_page,
-                step=1,
-                key="page_input"
-            )
-
-            if page_input != current_page:
-                st.session_state.current_page = page_input
-                st.rerun()
-
-            st.markdown(
-                f"<div style='text-align: center; font-weight: bold; padding-top: 0.5rem;'>페이지 {current_page} / {total_pages}</div>",
-                unsafe_allow_html=True
-            )
-
-        with col_next:
-            if st.button("다음 ➡️", key="next_page"):
-                if current_page < total_pages:
-                    st.session_state.current_page = current_page + 1
-                    st.rerun()
+    btn_cols = st.columns([3, 1.3])  # 왼쪽 공간 3, 오른쪽 버튼 1 비율
+    with btn_cols[1]:
+        st.button("🔄 필터 초기화", key="filter_reset", on_click=reset_filters)
+
+    # 사용자가 바꾼 입력이 달라지면 첫 페이지로 ('지금 운영 중'은 분이 바뀌어도 보던 페이지 유지)
+    filter_inputs = (selected_types, selected_caps) + tuple(
+        st.session_state.get(k) for k in
+        ("filter_hours_mode", "filter_hours_day", "filter_hours_time", "filter_hours_unknown")
+    )
+    if st.session_state.get("last_filter") != filter_inputs:
+        st.session_state.current_page = 1
+        st.session_state.last_filter = filter_inputs
+
+    # ✅ 필터링 로직 (마스크) + 충전소 키 정렬 인덱스는 필터나 데이터 버전이 바뀔 때만 다시 생성
+    # (세션에는 df 의 행 위치만 저장 - 동기화로 df 가 바뀌면 data_version 이 달라져 위치도 새로 만든다)
+    filter_key = (region, district, data_version(df),
+                  tuple(selected_types), tuple(selected_caps), open_at, include_unknown)
+    cached = st.session_state.get("filter_page_index")
+    if cached is None or cached["key"] != filter_key:
+        with timed_section("필터링·정렬 인덱스"):
+            mask = filter_charger_mask(df, selected_types, selected_caps, open_at, include_unknown)
+            cached = {
+                "key": filter_key,
+                "index": build_station_page_index(df, mask),
+                "charger_count": int(mask.sum()),
+            }
+        st.session_state.filter_page_index = cached
+        # 필터 프래그먼트만 다시 실행된 경우 → 결과 목록도 새 인덱스로 그리도록 전체 실행
+        if not st.session_state.get("filter_full_run"):
+            st.rerun()
+
+    filtered_station_count = len(cached["index"]["starts"]) - 1
+    st.markdown("### 📊 필터링 결과 요약")
+    st.markdown(f"🔎 **필터링된 충전소 수:** <span style='color:#4CAF50;font-weight:bold'>{filtered_station_count}</span> 개", unsafe_allow_html=True)
+    st.markdown(f"🔋 **충전기 수 총합:** <span style='color:#4CAF50;font-weight:bold'>{cached['charger_count']}</span> 기", unsafe_allow_html=True)
+
+
+@timed_fragment("결과 목록")
+def render_results_list(df):
+    page_index = st.session_state.filter_page_index["index"]
+
+    items_per_page = 10
+    total_items = len(page_index["starts"]) - 1
+    total_pages = max((total_items - 1) // items_per_page + 1, 1)
+
+    # 현재 페이지 상태
+    if "current_page" not in st.session_state:
+        st.session_state.current_page = 1
+    current_page = min(st.session_state.current_page, total_pages)  # 로컬 변수 사용
+
+    # ✅ 현재 페이지 충전소만 요약 (주소 정리는 수집 시점의 clean_address 사용)
+    page_rows, _ = get_station_page(df, page_index, current_page, items_per_page)
+    if not page_rows.empty:
+        page_rows = page_rows.assign(address=page_rows['clean_address'])
+    summarized_df = summarize_station_rows(page_rows)
+
+    # 컬럼명 한글로 변경
+    paged_df = summarized_df.rename(columns={
+        'station_name': '장소',
+        'address': '주소',
+        'charger_types': '충전기 타입',
+        'capacities': '용량'
+    }).reset_index(drop=True)
+
+    # 번호 붙이기 (전체 순번 기준)
+    start_idx = (current_page - 1) * items_per_page
+    end_idx = start_idx + items_per_page
+    if not paged_df.empty:
+        paged_df['장소'] = [f"{start_idx + i + 1}. {name}" for i, name in enumerate(paged_df['장소'])]
+
+    force_collapse = True
+    # 리스트 출력
+    st.subheader(f"📋 충전소 리스트 (총 {total_items}개 중 {start_idx+1}~{min(end_idx, total_items)}번)")
+    st.markdown(render_station_html_details_g(paged_df, force_collapse=force_collapse), unsafe_allow_html=True)
+
+    # 페이지네이션 UI
+    col_prev, col_info, col_next = st.columns([1, 2, 0.6])
+
+    with col_prev:
+        st.button("⬅️ 이전", key="prev_page", on_click=set_current_page, args=(current_page - 1, total_pages))
+
+    with col_info:
+        # 스타일을 적용한 number_input
+        st.markdown(
+            """
+            <style>
+            div[data-testid="stNumberInput"] {
+                width: 100px;
+                margin: 0 auto;
+            }
+            </style>
+            """,
+            unsafe_allow_html=True
+        )
+
+        st.number_input(
+            " ",  # 라벨을 공백으로 해서 공간 절약
+            min_value=1,
+            max_value=total_pages,
+            value=current_page,
+            step=1,
+            key="page_input",
+            on_change=sync_page_input
+        )
+
+        st.markdown(
+            f"<div style='text-align: center; font-weight: bold; padding-top: 0.5rem;'>페이지 {current_page} / {total_pages}</div>",
+            unsafe_allow_html=True
+        )
+
+    with col_next:
+        st.button("다음 ➡️", key="next_page", on_click=set_current_page, args=(current_page + 1, total_pages))
+
+    render_timing_report()
+
+
+col1, col2 = st.columns([1.2, 2])
+with col1:
+    render_filter_panel(region, district, df)
+with col2:
+    render_results_list(df)
+
+st.session_state.filter_full_run = False
+render_memory_report()
+record_timing("전체 스크립트", (time.perf_counter() - script_start) * 1000)
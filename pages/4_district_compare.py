@@ -0,0 +1,102 @@
+# pages/4_구군_비교.py
+import streamlit as st
+import plotly.express as px
+import time
+from db_utils import get_region_list, get_district_list, get_districts_station_data
+from ev_ui_utils import (
+    compare_districts, compare_district_shares,
+    record_timing, timed_section, render_timing_report, render_freshness_indicator
+)
+
+st.set_page_config(page_title="구/군 비교", layout="wide")
+st.title("🆚 구/군 비교")
+
+script_start = time.perf_counter()
+
+# 🔁 초기값 설정
+DEFAULT_REGION = "충청남도"
+DEFAULT_DISTRICTS = ["논산시 ", "공주시 ", "계룡시 "]
+MAX_COMPARE = 10
+
+region_list = get_region_list()
+default_region_index = region_list.index(DEFAULT_REGION) if DEFAULT_REGION in region_list else 0
+
+col_region, col_district = st.columns([1, 3])
+with col_region:
+    region = st.selectbox("📍 시/도 선택", region_list, index=default_region_index, key="compare_region")
+
+district_list = [d for d in get_district_list(region) if d != "전체"]
+default_districts = [d for d in DEFAULT_DISTRICTS if d in district_list] if region == DEFAULT_REGION else district_list[:2]
+with col_district:
+    districts = st.multiselect(
+        f"🗺️ 비교할 구/군 (최대 {MAX_COMPARE}개)", district_list,
+        default=default_districts, max_selections=MAX_COMPARE, key=f"compare_districts_{region}"
+    )
+
+if not districts:
+    st.info("비교할 구/군을 하나 이상 선택하세요.")
+    st.stop()
+
+# -----------------------------
+# 📥 선택한 구/군을 한 번에 불러오기 (IN 조회 한 번 또는 전국 스냅샷에서 잘라 쓰기)
+# - 선택 순서와 상관없이 같은 캐시 항목을 쓰도록 정렬한 튜플로 넘긴다
+# -----------------------------
+with timed_section("구/군 데이터 조회"):
+    df = get_districts_station_data(region, tuple(sorted(districts)))
+render_freshness_indicator(df)
+
+if df.empty:
+    st.warning("선택한 구/군에 충전소 데이터가 없습니다.")
+    st.stop()
+
+# -----------------------------
+# 📊 구/군별 지표 (groupby 한 번)
+# -----------------------------
+with timed_section("구/군 비교 집계"):
+    table = compare_districts(df)
+    type_shares = compare_district_shares(df, "charger_type")
+    facility_shares = compare_district_shares(df, "facility_major")
+
+st.markdown("### 📋 구/군별 요약")
+st.dataframe(table.drop(columns=["region_name"]).rename(columns={"district_name": "구/군"}),
+             hide_index=True, use_container_width=True)
+
+col_a, col_b = st.columns(2)
+with col_a:
+    fig = px.bar(
+        table, x="district_name", y=["충전소 수", "충전기 수"], barmode="group",
+        title="🏢 충전소·충전기 수", labels={"district_name": "구/군", "value": "개수", "variable": ""},
+        color_discrete_sequence=px.colors.qualitative.Set2
+    )
+    fig.update_layout(height=400)
+    st.plotly_chart(fig, use_container_width=True)
+
+with col_b:
+    fig = px.bar(
+        table, x="district_name", y="급속 비율(%)", text="급속 비율(%)",
+        title="⚡ 급속 충전기 비율 (%)", labels={"district_name": "구/군"},
+        color="district_name", color_discrete_sequence=px.colors.qualitative.Bold
+    )
+    fig.update_layout(height=400, showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
+
+col_c, col_d = st.columns(2)
+with col_c:
+    fig = px.bar(
+        type_shares, barmode="stack", title="🔌 충전기 종류 구성 (%)",
+        labels={"district_name": "구/군", "value": "비율(%)", "charger_type": "종류"},
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+    fig.update_layout(height=400)
+    st.plotly_chart(fig, use_container_width=True)
+
+with col_d:
+    fig = px.imshow(
+        facility_shares, text_auto=True, aspect="auto", color_continuous_scale="Blues",
+        title="🏢 시설 유형 구성 (%)", labels={"x": "시설 유형", "y": "구/군", "color": "비율(%)"}
+    )
+    fig.update_layout(height=400)
+    st.plotly_chart(fig, use_container_width=True)
+
+record_timing("전체 스크립트", (time.perf_counter() - script_start) * 1000)
+render_timing_report()
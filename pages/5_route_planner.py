@@ -0,0 +1,161 @@
+# pages/5_경로_계획.py
+import streamlit as st
+import folium
+import time
+from streamlit_folium import st_folium
+from search_utils import get_station_search_index, search_stations
+from route_utils import plan_route, corridor_stations, range_bucket, MIN_KW_OPTIONS, ROAD_FACTOR
+from spatial_utils import CONNECTOR_BITS
+from ev_ui_utils import record_timing, timed_section, render_timing_report
+
+st.set_page_config(page_title="충전 경로 계획", layout="wide")
+st.title("🧭 충전 경로 계획")
+
+script_start = time.perf_counter()
+
+# 🔁 초기값 설정
+DEFAULT_ORIGIN = "서울"
+DEFAULT_DESTINATION = "부산"
+CORRIDOR_MAP_LIMIT = 500   # 지도에 그리는 경로 주변 충전소 수 상한 (표에는 모두 표시)
+
+
+# 📍 출발/도착 지점: 전국 검색 색인에서 충전소·주소로 고른다
+def pick_location(label, key, default_query):
+    query = st.text_input(f"{label} 검색", value=default_query, key=f"{key}_query",
+                          placeholder="충전소 이름·주소 (예: 논산시청, ㄴㅅㅅㅊ)")
+    if not query.strip():
+        return None
+    results = search_stations(get_station_search_index(), query)
+    if results.empty:
+        st.caption("검색 결과가 없습니다.")
+        return None
+    options = list(range(len(results)))
+    choice = st.selectbox(
+        label, options, key=f"{key}_pick",
+        format_func=lambda i: f"{results.iloc[i]['station_name']} · {results.iloc[i]['region_name']} {results.iloc[i]['district_name']}"
+    )
+    return results.iloc[choice]
+
+
+col_origin, col_destination = st.columns(2)
+with col_origin:
+    origin = pick_location("🚩 출발", "route_origin", DEFAULT_ORIGIN)
+with col_destination:
+    destination = pick_location("🏁 도착", "route_destination", DEFAULT_DESTINATION)
+
+col_range, col_kw = st.columns(2)
+with col_range:
+    range_km = st.slider("🔋 완충 주행 가능 거리 (km)", min_value=50, max_value=600, value=300, step=10,
+                         key="route_range")
+with col_kw:
+    min_kw = st.select_slider("⚡ 최소 충전 용량 (kW)", options=list(MIN_KW_OPTIONS), value=50, key="route_min_kw")
+
+if origin is None or destination is None:
+    st.info("출발지와 도착지를 선택하세요.")
+    st.stop()
+
+# -----------------------------
+# 🧭 경로 계획 (그래프는 주행 거리 구간·최소 용량별로 캐시, 탐색만 매번)
+# -----------------------------
+origin_point = (float(origin["latitude"]), float(origin["longitude"]))
+destination_point = (float(destination["latitude"]), float(destination["longitude"]))
+with st.spinner("충전소 그래프 준비 중..."), timed_section("경로 계획"):
+    route = plan_route(origin_point, destination_point, range_km, min_kw)
+
+st.caption(
+    f"거리는 직선 거리 × {ROAD_FACTOR} 로 추정한 값입니다. "
+    f"주행 가능 거리는 {range_bucket(range_km)} km 로 내려서 계산합니다."
+)
+
+if route is None:
+    st.warning("주어진 주행 거리와 최소 충전 용량으로는 도착할 수 있는 충전 경로가 없습니다.")
+    st.stop()
+
+stops = route["stops"]
+col1, col2, col3 = st.columns(3)
+col1.metric("🛣️ 예상 주행 거리", f"{route['total_km']:.0f} km")
+col2.metric("🔌 충전 횟수", f"{len(stops)} 회")
+col3.metric("📏 가장 긴 구간", f"{route['legs_km'].max():.0f} km")
+
+if stops.empty:
+    st.success("충전 없이 도착할 수 있습니다.")
+else:
+    st.markdown("### 🔌 충전 경유지")
+    st.dataframe(
+        stops[["station_name", "region_name", "district_name", "max_kw", "charger_count", "leg_km", "cumulative_km"]]
+        .rename(columns={
+            "station_name": "충전소", "region_name": "시/도", "district_name": "구/군",
+            "max_kw": "최대 용량(kW)", "charger_count": "충전기 수",
+            "leg_km": "이전 지점부터(km)", "cumulative_km": "누적(km)",
+        }),
+        hide_index=False, use_container_width=True
+    )
+
+points = [origin_point] + list(zip(stops["latitude"], stops["longitude"])) + [destination_point]
+
+
+# 📝 "위도, 경도" 한 줄에 한 점
+def parse_polyline(text):
+    polyline = []
+    for line in text.splitlines():
+        try:
+            lat, lon = (float(v) for v in line.replace(" ", "").split(","))
+        except ValueError:
+            continue
+        polyline.append((lat, lon))
+    return polyline
+
+
+# -----------------------------
+# 🛣️ 경로 주변 충전소 (계획한 경로 또는 직접 입력한 좌표열)
+# -----------------------------
+st.markdown("### 🛣️ 경로 주변 충전소")
+col_width, col_conn, col_corridor_kw = st.columns([1, 2, 1])
+with col_width:
+    width_km = st.slider("경로에서 거리 (km)", min_value=1, max_value=20, value=5, key="corridor_width")
+with col_conn:
+    selected_connectors = st.multiselect("🔌 커넥터 (하나라도 있으면 표시)", list(CONNECTOR_BITS), key="corridor_connectors")
+with col_corridor_kw:
+    corridor_min_kw = st.select_slider("⚡ 최소 용량 (kW)", options=list(MIN_KW_OPTIONS), value=0, key="corridor_min_kw")
+with st.expander("📝 좌표 직접 입력 (예: 고속도로 경로)"):
+    custom_polyline = parse_polyline(st.text_area("한 줄에 '위도, 경도'", key="corridor_polyline", height=120))
+
+polyline = custom_polyline if len(custom_polyline) >= 2 else points
+connector_bits = sum(CONNECTOR_BITS[c] for c in selected_connectors)
+with timed_section("경로 주변 검색"):
+    corridor = corridor_stations(polyline, width_km, connector_bits, corridor_min_kw)
+
+st.caption(f"경로 {width_km} km 이내 충전소 {len(corridor):,}곳 (경로 진행 순)")
+st.dataframe(
+    corridor[["route_km", "offset_km", "station_name", "region_name", "district_name", "max_kw", "charger_count"]]
+    .rename(columns={
+        "route_km": "경로상 위치(km)", "offset_km": "경로까지(km)", "station_name": "충전소",
+        "region_name": "시/도", "district_name": "구/군", "max_kw": "최대 용량(kW)", "charger_count": "충전기 수",
+    }),
+    hide_index=True, use_container_width=True, height=300
+)
+
+# 🗺️ 경로 지도
+m = folium.Map(location=[sum(p[0] for p in polyline) / len(polyline), sum(p[1] for p in polyline) / len(polyline)])
+folium.PolyLine(polyline, color="#1976D2", weight=4, opacity=0.8).add_to(m)
+folium.Marker(origin_point, tooltip=f"출발: {origin['station_name']}",
+              icon=folium.Icon(color="green", icon="play", prefix="fa")).add_to(m)
+folium.Marker(destination_point, tooltip=f"도착: {destination['station_name']}",
+              icon=folium.Icon(color="red", icon="flag-checkered", prefix="fa")).add_to(m)
+for i, row in enumerate(stops.itertuples(index=False), start=1):
+    folium.Marker(
+        [row.latitude, row.longitude],
+        tooltip=f"{i}. {row.station_name} ({row.max_kw:.0f}kW)",
+        icon=folium.Icon(color="blue", icon="bolt", prefix="fa")
+    ).add_to(m)
+for row in corridor.head(CORRIDOR_MAP_LIMIT).itertuples(index=False):
+    folium.CircleMarker(
+        [row.latitude, row.longitude], radius=4, color="#FF7043", fill=True, fill_opacity=0.7,
+        tooltip=f"{row.station_name} · 경로 {row.route_km}km 지점, {row.offset_km}km 거리"
+    ).add_to(m)
+m.fit_bounds([[min(p[0] for p in polyline), min(p[1] for p in polyline)],
+              [max(p[0] for p in polyline), max(p[1] for p in polyline)]])
+st_folium(m, height=550, use_container_width=True, returned_objects=[], key="route_map")
+
+record_timing("전체 스크립트", (time.perf_counter() - script_start) * 1000)
+render_timing_report()
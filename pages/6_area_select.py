@@ -0,0 +1,100 @@
+# pages/6_영역_선택.py
+import streamlit as st
+import folium
+import plotly.express as px
+import time
+from folium.plugins import Draw
+from streamlit_folium import st_folium
+from spatial_utils import stations_in_polygons
+from tile_utils import add_density_layer
+from utils import load_or_create_nationwide_data
+from ev_ui_utils import (
+    compare_districts, generate_summary, render_station_cards, CARDS_PER_PAGE, FAST_CHARGER_KW,
+    record_timing, timed_section, render_timing_report
+)
+
+st.set_page_config(page_title="영역 선택", layout="wide")
+st.title("✏️ 지도에서 영역 선택")
+
+script_start = time.perf_counter()
+
+st.markdown("지도 왼쪽 위 도구로 **다각형** 또는 **사각형**을 그리면 그 안의 충전소를 모아 보여줍니다. "
+            "여러 개를 그리면 모두 합친 영역입니다.")
+
+# -----------------------------
+# 🗺️ 그리기 지도 (충전소 마커 대신 밀도 타일 - 전국 범위에서도 가볍게)
+# -----------------------------
+m = folium.Map(location=[36.3, 127.8], zoom_start=7, tiles="cartodbpositron")
+add_density_layer(m)
+Draw(
+    export=False,
+    draw_options={"polyline": False, "circle": False, "marker": False, "circlemarker": False,
+                  "polygon": True, "rectangle": True},
+    edit_options={"edit": True, "remove": True},
+).add_to(m)
+drawn = st_folium(m, key="area_map", height=550, use_container_width=True, returned_objects=["all_drawings"])
+
+polygons = [
+    feature["geometry"]["coordinates"]
+    for feature in (drawn or {}).get("all_drawings") or []
+    if feature.get("geometry", {}).get("type") == "Polygon"
+]
+if not polygons:
+    st.info("지도에 영역을 그려 주세요.")
+    st.stop()
+
+# -----------------------------
+# 📍 영역 안 충전소 (격자 색인으로 후보만 → 다각형 포함 판정)
+# -----------------------------
+with timed_section("영역 안 충전소 찾기"):
+    stations = stations_in_polygons(polygons)
+    nationwide = load_or_create_nationwide_data()
+    df = nationwide[nationwide["station_id"].isin(stations["station_id"].to_numpy())]
+
+if df.empty:
+    st.warning("선택한 영역에 충전소가 없습니다.")
+    st.stop()
+
+with timed_section("영역 집계"):
+    table = compare_districts(df)
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("🏢 충전소 수", f"{len(stations):,} 개")
+col2.metric("🔌 충전기 수", f"{len(df):,} 기")
+col3.metric(f"⚡ 급속({FAST_CHARGER_KW}kW 이상) 비율", f"{table['급속 충전기'].sum() / len(df) * 100:.1f}%")
+col4.metric("🗺️ 구/군 수", f"{len(table)} 곳")
+
+st.markdown("### 📋 영역 안 구/군별 요약")
+st.dataframe(table.rename(columns={"region_name": "시/도", "district_name": "구/군"}),
+             hide_index=True, use_container_width=True)
+
+col_a, col_b = st.columns(2)
+with col_a:
+    top = table.nlargest(15, "충전기 수")
+    fig = px.bar(
+        top, x="district_name", y="충전기 수", color="region_name", text="충전기 수",
+        title="🏢 구/군별 충전기 수 (상위 15)", labels={"district_name": "구/군", "region_name": "시/도"},
+        color_discrete_sequence=px.colors.qualitative.Set2
+    )
+    fig.update_layout(height=420, xaxis_tickangle=-45)
+    st.plotly_chart(fig, use_container_width=True)
+
+with col_b:
+    type_counts = df["charger_type"].astype(str).value_counts().rename_axis("종류").reset_index(name="충전기 수")
+    fig = px.pie(
+        type_counts, names="종류", values="충전기 수", hole=0.4, title="🔌 충전기 종류 구성",
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+    fig.update_layout(height=420)
+    st.plotly_chart(fig, use_container_width=True)
+
+# 🧾 충전기가 많은 충전소 카드 (카드용 요약은 보여 줄 충전소만 만든다)
+st.markdown(f"### 📄 충전기가 많은 충전소 (상위 {CARDS_PER_PAGE}곳)")
+top_ids = stations.nlargest(CARDS_PER_PAGE, "charger_count")["station_id"].to_numpy()
+with timed_section("카드 목록"):
+    summary = generate_summary(df[df["station_id"].isin(top_ids)])
+    summary = summary.sort_values("charger_count", ascending=False).reset_index(drop=True)
+    render_station_cards(summary, 0, CARDS_PER_PAGE)
+
+record_timing("전체 스크립트", (time.perf_counter() - script_start) * 1000)
+render_timing_report()
@@ -0,0 +1,103 @@
+# prefetch_utils.py
+# 🔮 다음에 고를 가능성이 높은 인접 구/군 데이터를 백그라운드 스레드에서 미리 캐시에 올려둔다
+#  - 프로세스당 낮은 우선순위 워커 스레드 1개
+#  - 세션별 세대(generation) 번호로, 선택이 바뀌면 이전 예약은 실행하지 않고 버림
+#  - 공유 프레임 메모리가 예산을 넘으면 미리 불러오지 않음
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from db_utils import get_shared_frames_bytes
+
+
+PREFETCH_COUNT = 3               # 선택한 구/군 다음으로 미리 불러올 구/군 수
+PREFETCH_MEMORY_BUDGET_MB = 512  # 공유 프레임 총량이 이보다 크면 프리페치 중단
+PREFETCH_IDLE_DELAY = 0.2        # 작업 사이 쉬는 시간 (초) - 화면 요청에 CPU/DB 양보
+PREFETCH_MAX_OWNERS = 1024       # 세대 번호를 기억할 세션 수 - 넘으면 가장 오래 예약이 없던 세션부터 잊음
+
+_jobs = queue.Queue()
+_generations = OrderedDict()
+_generations_lock = threading.Lock()
+_worker = None
+_worker_lock = threading.Lock()
+PREFETCH_STATS = {"scheduled": 0, "done": 0, "cancelled": 0, "skipped_budget": 0, "failed": 0}
+_stats_lock = threading.Lock()
+
+
+def current_session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "default"
+
+
+def _count(key, n=1):
+    # 워커 스레드와 화면 스레드가 함께 고치므로 잠금 안에서
+    with _stats_lock:
+        PREFETCH_STATS[key] += n
+
+
+def get_prefetch_stats():
+    with _stats_lock:
+        return dict(PREFETCH_STATS)
+
+
+def _is_current(owner, generation):
+    with _generations_lock:
+        return _generations.get(owner) == generation
+
+
+def _lower_thread_priority():
+    # 리눅스에서는 스레드 단위 nice 값 적용 가능, 그 외 환경은 무시
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass
+
+
+def _run_worker():
+    _lower_thread_priority()
+    while True:
+        owner, generation, loader, args = _jobs.get()
+        try:
+            if not _is_current(owner, generation):
+                _count("cancelled")
+            elif get_shared_frames_bytes() > PREFETCH_MEMORY_BUDGET_MB * 1024**2:
+                _count("skipped_budget")
+            else:
+                loader(*args)
+                _count("done")
+        except Exception:
+            _count("failed")
+        finally:
+            _jobs.task_done()
+        time.sleep(PREFETCH_IDLE_DELAY)
+
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run_worker, name="district-prefetch", daemon=True)
+            _worker.start()
+
+
+def schedule_prefetch(owner, region, districts, loaders, count=PREFETCH_COUNT):
+    """
+    owner(세션)의 이전 예약을 취소하고, districts 앞쪽 count 개 구/군에 대해
+    loaders(region, district) 를 순서대로 백그라운드에서 실행한다.
+    """
+    with _generations_lock:
+        generation = _generations.pop(owner, 0) + 1
+        _generations[owner] = generation
+        # 끝난 세션은 알 수 없으니 최근 예약 순으로 일정 수만 기억 (잊힌 세션의 남은 작업은 취소됨)
+        while len(_generations) > PREFETCH_MAX_OWNERS:
+            _generations.popitem(last=False)
+
+    _ensure_worker()
+    jobs = [(owner, generation, loader, (region, district)) for district in districts[:count] for loader in loaders]
+    for job in jobs:
+        _jobs.put(job)
+    _count("scheduled", len(jobs))
@@ -0,0 +1,211 @@
+# route_utils.py
+# 🧭 주행 가능 거리 기반 충전 경로 계획
+#  - 노드: 최소 용량 이상 충전소 중 격자 셀(주행 거리 / NODE_CELL_DIVISOR)마다 용량이 가장 큰 한 곳
+#    → 셀 크기가 주행 거리에 비례하므로 노드당 이웃 수가 주행 거리와 상관없이 일정 (희소 그래프)
+#  - 간선: 예상 도로 거리(직선 × ROAD_FACTOR)가 주행 거리 이내인 노드 쌍 - 격자 색인으로 이웃 셀만 비교
+#  - 그래프는 (주행 거리 구간, 최소 용량)별로 한 번만 만들어 캐시, 출발/도착 연결은 조회할 때 붙인다
+#  - 탐색: A* (비용 = 도로 거리 + 충전 1회당 STOP_PENALTY_KM, 휴리스틱 = 도착지까지 예상 도로 거리)
+#  - 경로 주변 검색: 경로를 SEGMENT_MAX_KM 이하 구간으로 나눈 뒤 구간별 상자 → 격자 셀 → 후보 충전소만 거리 계산
+import heapq
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from spatial_utils import (
+    KM_PER_DEG_LAT, build_grid_index, get_station_grid, get_station_points,
+    grid_block, grid_query, grid_query_boxes, radius_bbox
+)
+from utils import haversine
+
+ROAD_FACTOR = 1.25        # 직선 거리 → 예상 도로 거리
+RANGE_BUCKET_KM = 25      # 주행 거리는 이 단위로 내림해 그래프를 공유 (내림이라 항상 안전한 쪽)
+NODE_CELL_DIVISOR = 8     # 노드 격자 셀 = 주행 거리 / 8
+STOP_PENALTY_KM = 20      # 충전 1회를 이만큼의 거리로 환산 - 거리가 비슷하면 덜 서는 경로
+MIN_KW_OPTIONS = (0, 50, 100, 200)
+SEGMENT_MAX_KM = 10       # 경로 주변 검색: 구간 상자가 길쭉하게 커지지 않도록 이 길이 이하로 나눈다
+
+
+def range_bucket(range_km):
+    return max(RANGE_BUCKET_KM, int(range_km // RANGE_BUCKET_KM) * RANGE_BUCKET_KM)
+
+
+def _road_km(lat1, lon1, lat2, lon2):
+    return haversine(lat1, lon1, lat2, lon2) * ROAD_FACTOR
+
+
+def _select_nodes(points, cell_km):
+    # 셀마다 (최대 용량, 충전기 수)가 가장 큰 충전소 하나
+    grid = build_grid_index(points["latitude"], points["longitude"], cell_km)
+    cell_of = np.empty(len(points), dtype=np.int64)
+    cell_of[grid["order"]] = np.repeat(np.arange(len(grid["cells"])), np.diff(grid["starts"]))
+    ranked = np.lexsort((-points["charger_count"].to_numpy(), -points["max_kw"].to_numpy(), cell_of))
+    first_in_cell = np.r_[True, cell_of[ranked][1:] != cell_of[ranked][:-1]]
+    return points.iloc[np.sort(ranked[first_in_cell])].reset_index(drop=True)
+
+
+@st.cache_resource(ttl=600, max_entries=32)
+def get_charger_graph(range_km, min_kw):
+    """
+    range_km(구간 값) · min_kw 별 충전소 그래프 (CSR: indptr/indices/weights, 가중치 = 예상 도로 km).
+    """
+    points = get_station_points()
+    nodes = _select_nodes(points[points["max_kw"] >= min_kw], range_km / NODE_CELL_DIVISOR)
+    lat, lon = nodes["latitude"].to_numpy(), nodes["longitude"].to_numpy()
+
+    # 직선 reach km 격자: 한 셀의 출발 노드들은 주변 3×3 셀의 후보와만 거리 계산
+    reach = range_km / ROAD_FACTOR
+    grid = build_grid_index(lat, lon, reach)
+    src_parts, dst_parts, w_parts = [], [], []
+    for c in range(len(grid["cells"])):
+        sources = grid["order"][grid["starts"][c]:grid["starts"][c + 1]]
+        candidates = grid_block(grid, c)
+        dist = _road_km(lat[sources, None], lon[sources, None], lat[None, candidates], lon[None, candidates])
+        s, t = np.nonzero((dist <= range_km) & (sources[:, None] != candidates[None, :]))
+        src_parts.append(sources[s])
+        dst_parts.append(candidates[t])
+        w_parts.append(dist[s, t])
+
+    src = np.concatenate(src_parts) if src_parts else np.zeros(0, dtype=np.int64)
+    dst = np.concatenate(dst_parts) if dst_parts else np.zeros(0, dtype=np.int64)
+    weights = np.concatenate(w_parts) if w_parts else np.zeros(0)
+    order = np.argsort(src, kind="stable")
+    return {
+        "nodes": nodes,
+        "lat": lat, "lon": lon,
+        "grid": grid,
+        "indptr": np.concatenate([[0], np.cumsum(np.bincount(src, minlength=len(nodes)))]),
+        "indices": dst[order].astype(np.int32),
+        "weights": weights[order].astype(np.float32),
+        "range_km": range_km,
+    }
+
+
+def _within_range(graph, lat, lon):
+    # 한 지점에서 주행 거리 안에 있는 노드와 거리
+    reach = graph["range_km"] / ROAD_FACTOR
+    candidates = grid_query(graph["grid"], *radius_bbox(lat, lon, reach))
+    dist = _road_km(lat, lon, graph["lat"][candidates], graph["lon"][candidates])
+    keep = dist <= graph["range_km"]
+    return candidates[keep], dist[keep]
+
+
+def plan_route(origin, destination, range_km, min_kw=0):
+    """
+    origin/destination: (lat, lon). 출발할 때 완충, 충전소마다 완충한다고 보고
+    충전 경유지 목록을 찾는다. 반환: dict(stops=DataFrame, total_km, direct_km, range_km) 또는 None(불가).
+    """
+    bucket = range_bucket(range_km)
+    graph = get_charger_graph(bucket, min_kw)
+    nodes, indptr, indices, weights = graph["nodes"], graph["indptr"], graph["indices"], graph["weights"]
+    direct_km = float(_road_km(*origin, *destination))
+
+    if direct_km <= bucket:
+        path = []
+    else:
+        to_goal = _road_km(graph["lat"], graph["lon"], *destination)
+        g = np.full(len(nodes), np.inf)
+        parent = np.full(len(nodes), -1, dtype=np.int64)
+        start_nodes, start_km = _within_range(graph, *origin)
+        g[start_nodes] = start_km + STOP_PENALTY_KM
+        heap = [(g[v] + to_goal[v], int(v)) for v in start_nodes]
+        heapq.heapify(heap)
+        closed = np.zeros(len(nodes), dtype=bool)
+        goal = -1
+
+        while heap:
+            f, u = heapq.heappop(heap)
+            if closed[u] or f > g[u] + to_goal[u]:
+                continue
+            # 휴리스틱이 도착지까지의 실제 마지막 구간 거리와 같으므로 처음 꺼낸 도착 가능 노드가 최적
+            if to_goal[u] <= bucket:
+                goal = u
+                break
+            closed[u] = True
+            nbrs = indices[indptr[u]:indptr[u + 1]]
+            cost = g[u] + weights[indptr[u]:indptr[u + 1]] + STOP_PENALTY_KM
+            better = cost < g[nbrs]
+            nbrs, cost = nbrs[better], cost[better]
+            g[nbrs] = cost
+            parent[nbrs] = u
+            for v, c in zip(nbrs.tolist(), (cost + to_goal[nbrs]).tolist()):
+                heapq.heappush(heap, (c, v))
+
+        if goal < 0:
+            return None
+        path = []
+        while goal >= 0:
+            path.append(goal)
+            goal = parent[goal]
+        path.reverse()
+
+    stops = nodes.iloc[path].reset_index(drop=True)
+    lats = np.r_[origin[0], stops["latitude"].to_numpy(), destination[0]]
+    lons = np.r_[origin[1], stops["longitude"].to_numpy(), destination[1]]
+    legs = _road_km(lats[:-1], lons[:-1], lats[1:], lons[1:])
+    stops = stops.assign(leg_km=legs[:-1].round(1), cumulative_km=np.cumsum(legs)[:-1].round(1))
+    return {
+        "stops": stops,
+        "legs_km": legs,
+        "total_km": float(legs.sum()),
+        "direct_km": direct_km,
+        "range_km": bucket,
+    }
+
+
+def _densify(lat, lon):
+    # 경로의 각 구간을 SEGMENT_MAX_KM 이하 조각으로 나눈 점 배열 (조각 안에서는 선형 보간)
+    pieces = np.maximum(np.ceil(haversine(lat[:-1], lon[:-1], lat[1:], lon[1:]) / SEGMENT_MAX_KM), 1).astype(np.int64)
+    seg = np.repeat(np.arange(len(pieces)), pieces)
+    frac = (np.arange(pieces.sum()) - np.repeat(np.cumsum(pieces) - pieces, pieces)) / pieces[seg]
+    out_lat = np.r_[lat[seg] + (lat[seg + 1] - lat[seg]) * frac, lat[-1]]
+    out_lon = np.r_[lon[seg] + (lon[seg + 1] - lon[seg]) * frac, lon[-1]]
+    return out_lat, out_lon
+
+
+def corridor_stations(polyline, width_km, connectors=0, min_kw=0):
+    """
+    polyline: [(lat, lon), ...] 경로에서 width_km 이내 충전소 (경로 진행 순).
+    connectors: 커넥터 비트마스크 (하나라도 있으면 통과, 0 이면 전체), min_kw: 최대 용량 하한.
+    반환: get_station_points() 행 + route_km(출발부터 경로상 위치), offset_km(경로까지 거리)
+    """
+    points = get_station_points()
+    lat, lon = (np.asarray(v, dtype=float) for v in zip(*polyline))
+    if len(lat) == 1:
+        lat, lon = np.r_[lat, lat], np.r_[lon, lon]
+    lat, lon = _densify(lat, lon)
+    lat_a, lon_a, lat_b, lon_b = lat[:-1], lon[:-1], lat[1:], lon[1:]
+    seg_km = haversine(lat_a, lon_a, lat_b, lon_b)
+    seg_start_km = np.r_[0.0, np.cumsum(seg_km)[:-1]]
+
+    # 구간 상자(width 만큼 넓힘)와 겹치는 셀의 충전소만 (구간, 충전소) 후보 쌍으로
+    pad_lat = width_km / KM_PER_DEG_LAT
+    pad_lon = width_km / (KM_PER_DEG_LAT * np.cos(np.radians(np.maximum(np.abs(lat_a), np.abs(lat_b)))))
+    seg, pos = grid_query_boxes(
+        get_station_grid(),
+        np.minimum(lat_a, lat_b) - pad_lat, np.maximum(lat_a, lat_b) + pad_lat,
+        np.minimum(lon_a, lon_b) - pad_lon, np.maximum(lon_a, lon_b) + pad_lon,
+    )
+    keep = points["max_kw"].to_numpy()[pos] >= min_kw
+    if connectors:
+        keep &= (points["connectors"].to_numpy()[pos] & connectors) != 0
+    seg, pos = seg[keep], pos[keep]
+
+    # 구간 중간 위도 기준 평면(km) 좌표로 점-선분 거리
+    kx = KM_PER_DEG_LAT * np.cos(np.radians((lat_a[seg] + lat_b[seg]) / 2))
+    dx, dy = (lon_b[seg] - lon_a[seg]) * kx, (lat_b[seg] - lat_a[seg]) * KM_PER_DEG_LAT
+    px = (points["longitude"].to_numpy()[pos] - lon_a[seg]) * kx
+    py = (points["latitude"].to_numpy()[pos] - lat_a[seg]) * KM_PER_DEG_LAT
+    length_sq = dx * dx + dy * dy
+    t = np.clip(np.divide(px * dx + py * dy, length_sq, out=np.zeros_like(px), where=length_sq > 0), 0.0, 1.0)
+    offset = np.hypot(px - t * dx, py - t * dy)
+
+    # 충전소마다 가장 가까운 구간 하나 (충전소 → 거리순 정렬 후 첫 행)
+    near = offset <= width_km
+    seg, pos, t, offset = seg[near], pos[near], t[near], offset[near]
+    ranked = np.lexsort((offset, pos))
+    first = ranked[np.r_[True, pos[ranked][1:] != pos[ranked][:-1]]] if len(ranked) else ranked
+    route_km = seg_start_km[seg[first]] + t[first] * seg_km[seg[first]]
+
+    result = points.iloc[pos[first]].assign(route_km=route_km.round(1), offset_km=offset[first].round(2))
+    return result.sort_values("route_km", kind="stable").reset_index(drop=True)
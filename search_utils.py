@@ -0,0 +1,170 @@
+# search_utils.py
+# 🔎 전국 충전소 이름/주소 타이핑 검색
+#  - 한글 음절을 자모로 풀어(겹받침·이중모음도 분리) 1·2-gram 역색인을 만든다
+#    → 입력 중인 글자('논ㅅ', '논사')도 '논산'에 부분 일치
+#  - 초성만 입력하면('ㄴㅅㅅㅊ') 이름의 초성 문자열 색인에서 찾는다
+#  - posting list 교집합 → 실제 부분 문자열 확인 → 이름 앞부분 일치 > 이름 포함 > 주소 순
+import numpy as np
+import streamlit as st
+
+from collections import defaultdict
+from itertools import islice
+
+from db_utils import register_shared_frame
+from utils import load_or_create_nationwide_data
+
+
+SEARCH_RESULT_LIMIT = 10
+RANK_WINDOW = 5000  # 이름 일치가 이보다 많으면 (이름 짧은 순으로 정렬된) 앞쪽만 순위 계산
+
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSEONG = ["", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+             "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+
+# 겹받침/이중모음은 키보드로 치는 순서대로 나눈다 ('닭' 입력 중간 상태 '닥'도 일치하도록)
+COMPOUND_JAMO = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+}
+
+# 검색에 의미 없는 문자는 지운다 (띄어쓰기·괄호 차이 무시)
+_IGNORED = " \t\n()[]{}-_·,./|"
+
+
+def _build_tables():
+    jamo, initials = {}, {}
+    for code in range(0xAC00, 0xD7A4):
+        offset = code - 0xAC00
+        cho, jung, jong = offset // 588, (offset % 588) // 28, offset % 28
+        parts = CHOSEONG[cho] + JUNGSEONG[jung] + JONGSEONG[jong]
+        jamo[code] = "".join(COMPOUND_JAMO.get(c, c) for c in parts)
+        initials[code] = CHOSEONG[cho]
+    for compound, parts in COMPOUND_JAMO.items():
+        jamo[ord(compound)] = parts
+    for c in _IGNORED:
+        jamo[ord(c)] = None
+        initials[ord(c)] = None
+    return jamo, initials
+
+
+_JAMO_TABLE, _INITIAL_TABLE = _build_tables()
+
+
+def to_jamo(text):
+    """'논산 시청' → 'ㄴㅗㄴㅅㅏㄴㅅㅣㅊㅓㅇ' (소문자, 공백·괄호 제거)"""
+    return str(text).lower().translate(_JAMO_TABLE)
+
+
+def to_initials(text):
+    """'논산 시청' → 'ㄴㅅㅅㅊ' (한글 외 문자는 그대로)"""
+    return str(text).lower().translate(_INITIAL_TABLE)
+
+
+def _is_initials_query(token):
+    return all(c in CHOSEONG for c in token)
+
+
+def _build_postings(texts):
+    postings = defaultdict(list)
+    for doc_id, text in enumerate(texts):
+        grams = set(text)
+        grams.update(text[i:i + 2] for i in range(len(text) - 1))
+        for gram in grams:
+            postings[gram].append(doc_id)
+    # doc_id 순서로 추가했으므로 이미 정렬된 상태
+    return {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+
+@st.cache_resource(ttl=600)
+def get_station_search_index():
+    """
+    전국 스냅샷에서 충전소별 한 행을 뽑아 색인을 만든다 (프로세스당 한 번).
+    문서 번호는 이름이 짧은 순 - 순위가 같으면 번호가 작은 쪽이 먼저 나온다.
+    """
+    df = load_or_create_nationwide_data()
+    columns = ["station_id", "station_name", "display_name", "clean_address",
+               "region_name", "district_name", "latitude", "longitude"]
+    docs = (
+        df[[c for c in columns if c in df.columns]]
+        .drop_duplicates("station_id")
+        .astype({"station_name": object})
+        .fillna({"station_name": ""})
+    )
+    if "clean_address" not in docs.columns:
+        docs = docs.assign(clean_address=df.loc[docs.index, "address"])
+    docs = docs.assign(name_length=docs["station_name"].str.len())
+    docs = docs.sort_values(["name_length", "station_name"], kind="stable").reset_index(drop=True)
+
+    names = [to_jamo(n) for n in docs["station_name"]]
+    # 이름|주소 를 한 문자열로 - '|' 는 검색어에서 지워지므로 필드를 넘는 일치는 생기지 않는다
+    texts = [f"{n}|{to_jamo(a)}" for n, a in zip(names, docs["clean_address"].astype(object).fillna(""))]
+    initials = [to_initials(n) for n in docs["station_name"]]
+
+    register_shared_frame("station_search_docs", docs)
+    return {
+        "docs": docs,
+        "names": names,
+        "texts": texts,
+        "initials": initials,
+        "name_postings": _build_postings(names),
+        "postings": _build_postings(texts),
+        "initial_postings": _build_postings(initials),
+    }
+
+
+def _candidates(postings, token):
+    """token 의 모든 gram 이 들어 있는 문서 번호 (작은 posting 부터 교집합)"""
+    grams = {token} if len(token) == 1 else {token[i:i + 2] for i in range(len(token) - 1)}
+    lists = sorted((postings.get(g) for g in grams), key=lambda ids: -1 if ids is None else len(ids))
+    if lists[0] is None:
+        return np.empty(0, dtype=np.int32)
+    result = lists[0]
+    for ids in lists[1:]:
+        result = np.intersect1d(result, ids, assume_unique=True)
+        if not len(result):
+            break
+    return result
+
+
+def _matches(postings, texts, tokens):
+    """모든 단어가 들어 있는 문서 번호를 번호 순(이름 짧은 순)으로 하나씩 돌려준다"""
+    candidates = None
+    for token in sorted(tokens, key=len, reverse=True):
+        ids = _candidates(postings, token)
+        candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+        if not len(candidates):
+            return
+    # 3자모 이상 단어는 gram 이 모두 있어도 연속해서 나오는지 확인해야 한다
+    long_tokens = [t for t in tokens if len(t) > 2]
+    for doc_id in candidates:
+        if all(t in texts[doc_id] for t in long_tokens):
+            yield int(doc_id)
+
+
+def search_stations(index, query, limit=SEARCH_RESULT_LIMIT):
+    """
+    공백으로 나눈 모든 단어가 이름이나 주소에 들어 있는 충전소를 순위대로 limit 개 반환.
+    이름 앞부분 일치 > 이름 포함 > 주소 일치, 같은 순위 안에서는 이름이 짧은 순.
+    """
+    docs = index["docs"]
+    words = str(query).split()
+    if words and all(_is_initials_query(w) for w in words):
+        tokens, names, name_postings, full_postings = words, index["initials"], index["initial_postings"], None
+    else:
+        tokens = [t for t in (to_jamo(w) for w in words) if t]
+        names, name_postings, full_postings = index["names"], index["name_postings"], index["postings"]
+    if not tokens:
+        return docs.iloc[:0]
+
+    name_hits = list(islice(_matches(name_postings, names, tokens), RANK_WINDOW))
+    ranked = sorted(name_hits, key=lambda doc_id: not names[doc_id].startswith(tokens[0]))[:limit]
+
+    # 이름 일치가 모자랄 때만 주소 일치로 채운다 - 필요한 개수만큼만 확인하고 멈춤
+    if len(ranked) < limit and full_postings is not None:
+        seen = set(ranked)
+        rest = (doc_id for doc_id in _matches(full_postings, index["texts"], tokens) if doc_id not in seen)
+        ranked += islice(rest, limit - len(ranked))
+
+    return docs.iloc[ranked]
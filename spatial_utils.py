@@ -0,0 +1,195 @@
+# spatial_utils.py
+# 📐 충전소 좌표 공간 색인 - 경로 계획·경로 주변 검색·지도 영역 선택이 함께 쓴다
+#  - get_station_points(): 전국 스냅샷을 충전소당 한 행(좌표, 최대 용량, 커넥터 비트마스크)으로 줄인 표
+#  - build_grid_index(): 위경도를 cell_km 크기 격자로 나눠 셀 번호순 정렬 + 셀별 시작 위치 (CSR 형태)
+#    → 영역 조회는 겹치는 셀의 행 구간만 잘라 오고, 정확한 거리/포함 판정은 그 후보에만 한다
+import numpy as np
+import pandas as pd
+import streamlit as st
+from matplotlib.path import Path
+
+from db_utils import register_shared_frame, _map_unique
+from utils import load_or_create_nationwide_data
+
+KM_PER_DEG_LAT = 111.32
+
+# 커넥터 종류 → 비트 (충전기 종류 문자열 'DC콤보+DC차데모' 는 두 비트)
+CONNECTOR_BITS = {"DC콤보": 1, "AC완속": 2, "DC차데모": 4, "AC3상": 8, "NACS": 16}
+
+
+def connector_mask(charger_types):
+    """충전기 종류 문자열 Series → 커넥터 비트마스크 (uint8, 고유 문자열만 파싱)"""
+    def parse(uniques):
+        return [
+            sum(CONNECTOR_BITS.get(t.strip(), 0) for t in set(str(v).split("+"))) for v in uniques
+        ]
+    return _map_unique(charger_types, parse).astype(float).fillna(0).astype(np.uint8)
+
+
+def _capacity_kw(capacity):
+    kw = _map_unique(capacity, lambda u: u.astype(str).str.extract(r"(\d+(?:\.\d+)?)", expand=False).astype(float))
+    return kw.astype(float)
+
+
+@st.cache_resource(ttl=600)
+def get_station_points():
+    """
+    충전소당 한 행: station_id, station_name, region_name, district_name, latitude, longitude,
+    max_kw (최대 용량), connectors (커넥터 비트 OR), charger_count. 좌표가 없는 충전소는 뺀다.
+    """
+    df = load_or_create_nationwide_data()
+    codes, station_ids = pd.factorize(df["station_id"])
+    n = len(station_ids)
+
+    # 충전소별 집계는 groupby 대신 ufunc.at (비트 OR 는 groupby 집계 함수가 없음)
+    max_kw = np.full(n, -np.inf)
+    np.maximum.at(max_kw, codes, _capacity_kw(df["capacity"]).fillna(-np.inf).to_numpy())
+    connectors = np.zeros(n, dtype=np.uint8)
+    np.bitwise_or.at(connectors, codes, connector_mask(df["charger_type"]).to_numpy())
+
+    first = np.full(n, len(df))
+    np.minimum.at(first, codes, np.arange(len(df)))
+    points = (
+        df.iloc[first][["station_id", "station_name", "region_name", "district_name", "latitude", "longitude"]]
+        .reset_index(drop=True)
+        .assign(
+            max_kw=np.where(np.isfinite(max_kw), max_kw, 0.0).astype(np.float32),
+            connectors=connectors,
+            charger_count=np.bincount(codes, minlength=n).astype(np.int32),
+        )
+    )
+    valid = (
+        points["latitude"].between(-90, 90) & points["longitude"].between(-180, 180)
+        & ~((points["latitude"] == 0) & (points["longitude"] == 0))
+    )
+    return register_shared_frame("station_points", points[valid].reset_index(drop=True))
+
+
+STATION_GRID_KM = 5  # 충전소 격자 색인 셀 크기
+
+
+@st.cache_resource(ttl=600)
+def get_station_grid():
+    """get_station_points() 의 격자 색인 (위치 = points 의 행 번호)"""
+    points = get_station_points()
+    return build_grid_index(points["latitude"], points["longitude"], STATION_GRID_KM)
+
+
+def expand_ranges(starts, ends):
+    """[starts[i], ends[i]) 구간들을 이어 붙인 위치 배열 (파이썬 반복 없이)"""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return offsets + np.arange(total)
+
+
+def build_grid_index(lat, lon, cell_km):
+    """
+    좌표를 cell_km 격자로 나눈 색인. 경도 방향 셀 폭은 가장 높은 위도 기준이라
+    어디서든 셀 한 칸이 cell_km 이상이다.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    lat0 = lat.min() if len(lat) else 0.0
+    lon0 = lon.min() if len(lon) else 0.0
+    max_abs_lat = np.abs(lat).max() if len(lat) else 0.0
+    cell_lat = cell_km / KM_PER_DEG_LAT
+    cell_lon = cell_km / (KM_PER_DEG_LAT * max(np.cos(np.radians(max_abs_lat)), 0.01))
+
+    iy = np.floor((lat - lat0) / cell_lat).astype(np.int64)
+    ix = np.floor((lon - lon0) / cell_lon).astype(np.int64)
+    n_cols = int(ix.max()) + 1 if len(ix) else 1
+    keys = iy * n_cols + ix
+    order = np.argsort(keys, kind="stable")
+    cells, starts = np.unique(keys[order], return_index=True)
+    return {
+        "lat": lat, "lon": lon, "lat0": lat0, "lon0": lon0,
+        "cell_lat": cell_lat, "cell_lon": cell_lon, "cell_km": cell_km, "n_cols": n_cols,
+        "order": order,
+        "cells": cells,
+        "cell_row": cells // n_cols, "cell_col": cells % n_cols,
+        "starts": np.append(starts, len(order)),
+    }
+
+
+def grid_query(index, lat_min, lat_max, lon_min, lon_max):
+    """
+    위경도 상자와 겹치는 셀에 든 점의 위치 (원래 배열 기준). 상자 밖 점도 섞여 있을 수 있다.
+    """
+    row0 = np.floor((lat_min - index["lat0"]) / index["cell_lat"])
+    row1 = np.floor((lat_max - index["lat0"]) / index["cell_lat"])
+    col0 = np.floor((lon_min - index["lon0"]) / index["cell_lon"])
+    col1 = np.floor((lon_max - index["lon0"]) / index["cell_lon"])
+    hit = np.flatnonzero(
+        (index["cell_row"] >= row0) & (index["cell_row"] <= row1)
+        & (index["cell_col"] >= col0) & (index["cell_col"] <= col1)
+    )
+    return index["order"][expand_ranges(index["starts"][hit], index["starts"][hit + 1])]
+
+
+def grid_query_boxes(index, lat_min, lat_max, lon_min, lon_max):
+    """
+    상자 여러 개(배열)를 한 번에 조회: (상자 번호, 점 위치) 쌍 배열.
+    상자마다 덮는 셀 번호를 펼쳐 점유 셀 목록에서 찾고, 그 셀의 점 구간을 이어 붙인다.
+    """
+    max_row, max_col = int(index["cell_row"].max(initial=0)), index["n_cols"] - 1
+    row0 = np.clip(np.floor((np.asarray(lat_min) - index["lat0"]) / index["cell_lat"]), 0, None).astype(np.int64)
+    row1 = np.clip(np.floor((np.asarray(lat_max) - index["lat0"]) / index["cell_lat"]), None, max_row).astype(np.int64)
+    col0 = np.clip(np.floor((np.asarray(lon_min) - index["lon0"]) / index["cell_lon"]), 0, None).astype(np.int64)
+    col1 = np.clip(np.floor((np.asarray(lon_max) - index["lon0"]) / index["cell_lon"]), None, max_col).astype(np.int64)
+    widths = np.maximum(col1 - col0 + 1, 0)
+    counts = np.maximum(row1 - row0 + 1, 0) * widths
+
+    box = np.repeat(np.arange(len(counts)), counts)
+    k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    keys = (row0[box] + k // widths[box]) * index["n_cols"] + col0[box] + k % widths[box]
+    pos = np.searchsorted(index["cells"], keys)
+    found = pos < len(index["cells"])
+    found[found] = index["cells"][pos[found]] == keys[found]
+    box, pos = box[found], pos[found]
+
+    starts, ends = index["starts"][pos], index["starts"][pos + 1]
+    return np.repeat(box, ends - starts), index["order"][expand_ranges(starts, ends)]
+
+
+def grid_block(index, cell, radius=1):
+    """
+    index["cells"][cell] 과 그 주변 radius 칸(3×3 등) 셀에 든 점의 위치.
+    셀 한 칸이 cell_km 이상이므로 cell_km 이내 이웃은 모두 이 안에 있다.
+    """
+    row, col = index["cell_row"][cell], index["cell_col"][cell]
+    hit = np.flatnonzero(
+        (np.abs(index["cell_row"] - row) <= radius) & (np.abs(index["cell_col"] - col) <= radius)
+    )
+    return index["order"][expand_ranges(index["starts"][hit], index["starts"][hit + 1])]
+
+
+def radius_bbox(lat, lon, km):
+    """(lat, lon) 에서 km 안쪽을 모두 덮는 위경도 상자 (lat_min, lat_max, lon_min, lon_max)"""
+    dlat = km / KM_PER_DEG_LAT
+    dlon = km / (KM_PER_DEG_LAT * max(np.cos(np.radians(min(abs(lat) + dlat, 89.9))), 0.01))
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+
+def stations_in_polygons(polygons):
+    """
+    polygons: GeoJSON Polygon 좌표 목록 (각각 [외곽 고리, 구멍 고리...], 고리는 [[lon, lat], ...]).
+    하나라도 포함하는 충전소의 get_station_points() 행. 외곽 고리 상자의 격자 셀 후보만 판정한다.
+    """
+    points = get_station_points()
+    grid = get_station_grid()
+    inside = np.zeros(len(points), dtype=bool)
+    for rings in polygons:
+        outer = np.asarray(rings[0], dtype=float)
+        if len(outer) < 3:
+            continue
+        candidates = grid_query(grid, outer[:, 1].min(), outer[:, 1].max(), outer[:, 0].min(), outer[:, 0].max())
+        candidates = candidates[~inside[candidates]]
+        xy = np.column_stack([grid["lon"][candidates], grid["lat"][candidates]])
+        hit = Path(outer).contains_points(xy)
+        for hole in rings[1:]:
+            hit &= ~Path(np.asarray(hole, dtype=float)).contains_points(xy)
+        inside[candidates[hit]] = True
+    return points[inside]
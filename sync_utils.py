@@ -0,0 +1,232 @@
+# sync_utils.py
+# 🔄 DB → cache/ 증분 동기화
+#  - 워터마크: 마지막 동기화 때의 충전기 행별 내용 해시 (cache/station_row_hashes.parquet)
+#  - 먼저 구체화 테이블(migration_utils)을 원본 뷰에서 다시 만든다 → 앱이 DB 에서 직접 읽는 행도 이 시점 기준
+#  - 해시만 다시 받아 비교 → 추가/변경/삭제된 충전기가 속한 충전소만 DB에서 다시 읽음
+#  - 캐시된 범위별 parquet, 요약, 전국 Arrow 스냅샷에서 해당 충전소 행만 바꿔 끼움
+#  - 전국 스냅샷이 바뀌면 밀도 타일(tile_utils)도 바뀐 충전소 근처 타일만 다시 그린다
+#  - 변경 리포트는 cache/sync_reports.jsonl 에 한 줄씩 남긴다
+#  정기 실행: python sync_utils.py  (cron 등)
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from cache_utils import (
+    cache_path, file_lock, read_cache_index, read_table, write_table,
+    replace_entry, remove_entry,
+)
+from db_utils import (
+    STATION_KEY_COLUMNS, get_station_row_hashes, get_station_rows, scope_mask,
+    get_station_data, get_districts_station_data, get_charger_counts,
+)
+from ev_ui_utils import generate_summary, load_or_generate_summary
+from hours_utils import STATION_HOURS_NAME, get_station_hours
+from migration_utils import refresh_materialized_tables
+from route_utils import get_charger_graph
+from search_utils import get_station_search_index
+from spatial_utils import get_station_grid, get_station_points
+from tile_utils import build_density_tiles
+from utils import load_or_create_nationwide_data
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "station_row_hashes.parquet"
+REPORT_PATH = cache_path("sync_reports.jsonl")
+SYNC_LOCK_PATH = cache_path("sync.lock")
+SYNC_LOCK_TIMEOUT = 3600
+# 증분 패치 대상 (index.json 의 kind → 파일 형식)
+PATCHABLE_KINDS = {"station": "parquet", "nationwide": "arrow", "summary": "parquet"}
+# 인덱스 항목에서 다시 계산되는 값 - 교체할 때 meta 로 넘기지 않음
+_ENTRY_STATS = ("format", "rows", "bytes", "created_at", "builder")
+
+
+def diff_row_hashes(old, new):
+    """
+    두 해시 표를 키로 비교해 inserted / changed / deleted 행(키 + region_name)을 돌려준다.
+    """
+    keys = list(STATION_KEY_COLUMNS)
+    merged = old.merge(new, on=keys, how="outer", suffixes=("_old", "_new"), indicator=True)
+    both = merged["_merge"] == "both"
+    return {
+        "inserted": merged.loc[merged["_merge"] == "right_only", keys + ["region_name_new"]]
+                          .rename(columns={"region_name_new": "region_name"}),
+        "changed": merged.loc[both & (merged["row_hash_old"] != merged["row_hash_new"]), keys + ["region_name_new"]]
+                         .rename(columns={"region_name_new": "region_name"}),
+        "deleted": merged.loc[merged["_merge"] == "left_only", keys + ["region_name_old"]]
+                         .rename(columns={"region_name_old": "region_name"}),
+    }
+
+
+def _patch_rows(table, touched_ids, fresh):
+    """
+    table 에서 touched_ids 충전소 행을 빼고 fresh 행을 같은 스키마로 붙인다.
+    """
+    station_ids = table.column("station_id")
+    value_set = pa.array(touched_ids).cast(station_ids.type)
+    kept = table.filter(pc.invert(pc.is_in(station_ids, value_set=value_set)))
+    if fresh.empty:
+        return kept
+    added = pa.Table.from_pandas(fresh, schema=table.schema, preserve_index=False)
+    return pa.concat_tables([kept, added])
+
+
+def _patch_summary(summary, touched_ids, fresh):
+    kept = summary[~summary["station_id"].isin(touched_ids)]
+    if fresh.empty:
+        return kept
+    patched = pd.concat([kept, generate_summary(fresh)], ignore_index=True)
+    # generate_summary 와 같은 순서 (station_id 별 groupby)
+    return patched.sort_values("station_id", kind="stable").reset_index(drop=True)
+
+
+def _station_coords(table, touched_ids):
+    # touched_ids 충전소의 좌표 (전국 스냅샷을 고치기 전에 읽으면 이전 좌표)
+    station_ids = table.column("station_id")
+    value_set = pa.array(touched_ids).cast(station_ids.type)
+    return table.filter(pc.is_in(station_ids, value_set=value_set)).select(["latitude", "longitude"]).to_pandas()
+
+
+def _has_stations(name, fmt, kind, touched_ids):
+    if kind == "summary":
+        station_ids = pd.read_parquet(cache_path(name), columns=["station_id"])["station_id"]
+        return bool(station_ids.isin(touched_ids).any())
+    station_ids = read_table(cache_path(name), fmt).column("station_id")
+    value_set = pa.array(touched_ids).cast(station_ids.type)
+    return pc.any(pc.is_in(station_ids, value_set=value_set)).as_py() or False
+
+
+def _patch_entry(name, entry, touched_ids, fresh):
+    """
+    캐시 항목 하나를 고쳐 쓴다. 반환: 바뀐 행이 없으면 None, 고쳤으면 "patched",
+    스키마가 맞지 않아 지웠으면 "invalidated" (다음 조회 때 DB에서 다시 만듦)
+    """
+    kind = entry.get("kind")
+    fmt = PATCHABLE_KINDS[kind]
+    in_scope = fresh[scope_mask(fresh, entry.get("region"), entry.get("district"))]
+    meta = {k: v for k, v in entry.items() if k not in _ENTRY_STATS}
+
+    def write(tmp_path):
+        # 잠금 안에서 기존 파일을 읽어야 다른 프로세스의 갱신을 덮어쓰지 않는다
+        if kind == "summary":
+            summary = _patch_summary(pd.read_parquet(cache_path(name)), touched_ids, in_scope)
+            summary.to_parquet(tmp_path, index=False)
+            return len(summary)
+        table = _patch_rows(read_table(cache_path(name), fmt), touched_ids, in_scope)
+        return write_table(table, tmp_path, fmt)
+
+    # 이 범위에 해당하는 충전소가 하나도 없으면 건드리지 않는다
+    if in_scope.empty and not _has_stations(name, fmt, kind, touched_ids):
+        return None
+    try:
+        replace_entry(name, write, fmt=fmt, meta=meta)
+        return "patched"
+    except (pa.ArrowInvalid, pa.ArrowTypeError, KeyError, ValueError):
+        logger.exception("증분 패치 실패, 캐시 항목 삭제: %s", name)
+        remove_entry(name)
+        return "invalidated"
+
+
+def _save_watermark(hashes, synced_at):
+    def write(tmp_path):
+        hashes.to_parquet(tmp_path, index=False)
+        return len(hashes)
+    replace_entry(WATERMARK_NAME, write, meta={"kind": "sync_watermark", "synced_at": synced_at})
+
+
+def _write_report(report):
+    with file_lock(REPORT_PATH + ".lock"):
+        with open(REPORT_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=False) + "\n")
+
+
+def clear_app_caches():
+    """
+    이 프로세스의 st.cache_* 만 비운다.
+    ⚠️ python sync_utils.py 처럼 CLI 로 돌리면 비워지는 건 CLI 프로세스 캐시뿐이라, 실행 중인 streamlit 서버는
+    각 캐시 TTL(600초, 요약·운영 시간은 3600초)이 지날 때까지 동기화 전 프레임을 계속 보여 준다.
+    바로 반영하려면 서버를 재시작한다.
+    """
+    for cached in (get_station_data, get_districts_station_data, load_or_generate_summary,
+                   load_or_create_nationwide_data, get_station_search_index, get_charger_counts,
+                   get_station_hours, get_station_points, get_station_grid, get_charger_graph):
+        cached.clear()
+
+
+def sync_cached_datasets():
+    """
+    캐시된 데이터셋을 DB와 증분 동기화하고 변경 리포트(dict)를 돌려준다.
+    워터마크가 없으면(첫 실행) 캐시가 언제 기준인지 알 수 없으므로 패치 대상 항목을 지우고 기준만 저장한다.
+    """
+    start = time.perf_counter()
+    synced_at = datetime.now().isoformat(timespec="seconds")
+
+    with file_lock(SYNC_LOCK_PATH, timeout=SYNC_LOCK_TIMEOUT):
+        # 구체화 테이블을 먼저 맞춰야 해시/다시 읽는 행이 원본 뷰와 같다 (구체화 전이면 아무것도 안 함)
+        materialized = refresh_materialized_tables()
+        hashes = get_station_row_hashes()
+        entries = {
+            name: entry for name, entry in read_cache_index().items()
+            if entry.get("kind") in PATCHABLE_KINDS and os.path.exists(cache_path(name))
+        }
+        report = {"synced_at": synced_at, "hash_rows": len(hashes), "patched": [], "invalidated": [],
+                  "materialized": materialized}
+
+        watermark_path = cache_path(WATERMARK_NAME)
+        if not os.path.exists(watermark_path):
+            for name in entries:
+                remove_entry(name)
+            report.update(mode="baseline", invalidated=sorted(entries))
+        else:
+            diff = diff_row_hashes(pd.read_parquet(watermark_path), hashes)
+            changes = pd.concat(diff.values(), ignore_index=True)
+            touched_ids = changes["station_id"].drop_duplicates().tolist()
+            fresh = get_station_rows(touched_ids) if touched_ids else pd.DataFrame()
+
+            if touched_ids:
+                # 밀도 타일은 바뀐 충전소의 이전/새 좌표 근처만 다시 그린다
+                moved = [fresh[["latitude", "longitude"]]] + [
+                    _station_coords(read_table(cache_path(name), PATCHABLE_KINDS["nationwide"]), touched_ids)
+                    for name, entry in entries.items() if entry.get("kind") == "nationwide"
+                ]
+                for name, entry in entries.items():
+                    outcome = _patch_entry(name, entry, touched_ids, fresh)
+                    if outcome:
+                        report[outcome].append(name)
+                # 운영 시간 구간 표는 통째로 다시 만든다 (DISTINCT 조회 한 번)
+                if os.path.exists(cache_path(STATION_HOURS_NAME)):
+                    remove_entry(STATION_HOURS_NAME)
+                    report["invalidated"].append(STATION_HOURS_NAME)
+
+            report.update(
+                mode="delta",
+                rows={kind: len(rows) for kind, rows in diff.items()},
+                stations_touched=len(touched_ids),
+                rows_fetched=len(fresh),
+                regions=changes["region_name"].astype(str).str.strip().value_counts().to_dict(),
+            )
+
+        _save_watermark(hashes, synced_at)
+
+    clear_app_caches()
+    if any(entries[name].get("kind") == "nationwide" for name in report["patched"]):
+        coords = pd.concat(moved, ignore_index=True).astype("float64")
+        report["tiles"] = build_density_tiles(changed=(coords["latitude"].to_numpy(), coords["longitude"].to_numpy()))
+    report["elapsed_s"] = round(time.perf_counter() - start, 2)
+    _write_report(report)
+    logger.info(
+        "동기화 완료 (%s): 변경 %s, 패치 %d개, 재생성 대상 %d개, %.2fs",
+        report["mode"], report.get("rows", "-"), len(report["patched"]), len(report["invalidated"]),
+        report["elapsed_s"]
+    )
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(sync_cached_datasets(), ensure_ascii=False, indent=2))
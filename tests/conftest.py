@@ -0,0 +1,62 @@
+# tests/conftest.py
+# 🧪 공통 준비 - 저장소 루트 모듈 import, 가짜 DB(pd.read_sql 대체), 임시 cache/ 폴더
+import os
+import sys
+
+import pandas as pd
+import pytest
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_utils  # noqa: E402
+from migration_utils import _synthetic_station_rows  # noqa: E402
+
+
+class FakeDB:
+    """
+    pd.read_sql 대역. down=True 면 연결 오류를 낸다.
+    frames 에 SQL 일부 문자열 → 돌려줄 프레임을 넣으면 그 프레임을, 없으면 default 를 돌려준다.
+    """
+    def __init__(self):
+        self.down = False
+        self.calls = 0
+        self.frames = {}
+        self.default = pd.DataFrame({"v": [1]})
+
+    def read_sql(self, query, engine, params=None):
+        self.calls += 1
+        if self.down:
+            raise OperationalError(str(query), params, Exception("connection refused"))
+        sql = str(query)
+        for pattern, frame in self.frames.items():
+            if pattern in sql:
+                return frame.copy()
+        return self.default.copy()
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    # 브레이커/마지막 정상 결과는 프로세스 전역이라 테스트마다 처음 상태로
+    monkeypatch.setattr(db_utils, "DB_HEALTH", {
+        "state": "closed", "failures": 0, "opened_at": 0.0,
+        "last_success": None, "last_failure": None, "last_error": None,
+        "timeouts": 0, "stale_served": 0,
+    })
+    db_utils._last_good.clear()
+    db = FakeDB()
+    monkeypatch.setattr(db_utils.pd, "read_sql", db.read_sql)
+    yield db
+    db_utils._last_good.clear()
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    # cache/ 는 작업 폴더 기준 상대 경로
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "cache"
+
+
+@pytest.fixture(scope="session")
+def station_rows():
+    return db_utils.normalize_station_frame(_synthetic_station_rows(3000))
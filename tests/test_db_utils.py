@@ -0,0 +1,91 @@
+# tests/test_db_utils.py
+import os
+
+import pytest
+from sqlalchemy import text
+
+import db_utils
+from cache_utils import cache_path, read_cache_index, remove_entry
+from db_utils import DatabaseUnavailable, get_db_health, get_station_data, is_stale, read_sql
+
+
+# 🔌 서킷 브레이커: closed → open → half_open → closed/open
+def test_breaker_opens_after_consecutive_failures(fake_db):
+    query = text("SELECT 1")
+    assert read_sql(query).attrs["freshness"]["source"] == "db"
+
+    fake_db.down = True
+    for _ in range(db_utils.BREAKER_FAILURE_THRESHOLD):
+        result = read_sql(query)
+        assert is_stale(result)
+    assert get_db_health()["state"] == "open"
+
+    # 차단 중에는 DB 를 부르지 않고 마지막 정상 결과로 응답
+    calls = fake_db.calls
+    result = read_sql(query)
+    assert fake_db.calls == calls
+    assert result.attrs["freshness"]["source"] == "stale"
+
+
+def test_breaker_without_stale_result_raises(fake_db):
+    fake_db.down = True
+    with pytest.raises(DatabaseUnavailable):
+        read_sql(text("SELECT 2"))
+    # allow_stale=False 면 저장된 결과가 있어도 쓰지 않는다
+    fake_db.down = False
+    read_sql(text("SELECT 3"))
+    fake_db.down = True
+    with pytest.raises(DatabaseUnavailable):
+        read_sql(text("SELECT 3"), allow_stale=False)
+
+
+def test_breaker_half_open_probe_closes_on_success(fake_db, monkeypatch):
+    fake_db.down = True
+    for _ in range(db_utils.BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises(DatabaseUnavailable):
+            read_sql(text("SELECT 4"))
+    assert get_db_health()["state"] == "open"
+
+    # 대기 시간이 지나면 조회 하나가 복구 확인(probe)으로 나간다
+    monkeypatch.setattr(db_utils, "BREAKER_RESET_SECONDS", 0)
+    fake_db.down = False
+    result = read_sql(text("SELECT 4"))
+    assert not is_stale(result)
+    assert get_db_health()["state"] == "closed"
+    assert get_db_health()["failures"] == 0
+
+
+def test_breaker_failed_probe_reopens(fake_db, monkeypatch):
+    fake_db.down = True
+    for _ in range(db_utils.BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises(DatabaseUnavailable):
+            read_sql(text("SELECT 5"))
+
+    monkeypatch.setattr(db_utils, "BREAKER_RESET_SECONDS", 0)
+    with pytest.raises(DatabaseUnavailable):
+        read_sql(text("SELECT 5"))
+    assert get_db_health()["state"] == "open"
+
+
+# 🥖 DB 장애 중 받은 마지막 정상 결과는 cache/ 파일로 남기지 않는다
+def test_stale_station_data_is_not_persisted(fake_db, cache_dir, station_rows):
+    region = station_rows["region_name"].iloc[0]
+    rows = station_rows[station_rows["region_name"] == region].reset_index(drop=True)
+    fake_db.frames["station_charger_with_subsidy"] = rows[list(db_utils.STATION_COLUMNS)]
+
+    get_station_data.clear()
+    fresh = get_station_data(region)
+    assert not is_stale(fresh)
+    name = db_utils._station_cache_name(region, None)
+    assert os.path.exists(cache_path(name))
+
+    # 파일을 지운 뒤 DB 장애 → 마지막 정상 조회로 응답하되 파일은 다시 만들지 않는다
+    remove_entry(name)
+    get_station_data.clear()
+    fake_db.down = True
+    stale = get_station_data(region)
+
+    assert is_stale(stale)
+    assert len(stale) == len(fresh)
+    assert not os.path.exists(cache_path(name))
+    assert name not in read_cache_index()
@@ -0,0 +1,56 @@
+# tests/test_hours_utils.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from hours_utils import DAY_MINUTES, build_hours_table, open_mask, parse_operating_hours
+
+WEEK = 7 * DAY_MINUTES
+
+
+@pytest.mark.parametrize("text", ["24시간", "매일 24시간", "상시", "00:00~00:00"])
+def test_always_open(text):
+    assert parse_operating_hours(text) == [(0, WEEK)]
+
+
+@pytest.mark.parametrize("text", [None, np.nan, "정보없음"])
+def test_unknown(text):
+    assert parse_operating_hours(text) is None
+
+
+def test_daily_hours():
+    intervals = parse_operating_hours("09:00~18:00")
+    assert intervals == [(d * DAY_MINUTES + 540, d * DAY_MINUTES + 1080) for d in range(7)]
+
+
+def test_overnight_hours_wrap_to_next_day():
+    # 22:00~06:00 매일 → 하루 경계에서 이어 붙고, 일요일 밤은 월요일 새벽으로 넘어간다
+    intervals = parse_operating_hours("22:00~06:00")
+    assert intervals[0] == (0, 360)
+    assert intervals[-1] == (6 * DAY_MINUTES + 1320, WEEK)
+    assert (DAY_MINUTES - 120, DAY_MINUTES + 360) in intervals
+
+
+def test_sunday_overnight_wraps_to_monday():
+    assert parse_operating_hours("일 22:00~02:00") == [(0, 120), (6 * DAY_MINUTES + 1320, WEEK)]
+
+
+def test_weekdays_with_closed_weekend():
+    intervals = parse_operating_hours("평일 09:00~18:00, 주말 휴무")
+    assert intervals == [(d * DAY_MINUTES + 540, d * DAY_MINUTES + 1080) for d in range(5)]
+
+
+def test_open_mask_uses_parsed_intervals():
+    raw = pd.DataFrame({
+        "station_id": ["1", "2", "3"],
+        "available_time": ["24시간", "22:00~06:00", None],
+    })
+    hours = build_hours_table(raw)
+    ids = np.array(["1", "2", "3", "4"])
+
+    monday_3am = 180
+    assert open_mask(ids, hours, monday_3am).tolist() == [True, True, True, True]
+    assert open_mask(ids, hours, monday_3am, include_unknown=False).tolist() == [True, True, False, False]
+
+    monday_noon = 720
+    assert open_mask(ids, hours, monday_noon, include_unknown=False).tolist() == [True, False, False, False]
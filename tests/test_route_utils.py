@@ -0,0 +1,131 @@
+# tests/test_route_utils.py
+import heapq
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import spatial_utils
+from route_utils import (
+    STOP_PENALTY_KM, corridor_stations, get_charger_graph, plan_route, range_bucket, _road_km
+)
+from spatial_utils import CONNECTOR_BITS, KM_PER_DEG_LAT, get_station_grid, get_station_points
+
+
+@pytest.fixture
+def stations(monkeypatch):
+    # 경도 127.0 선을 따라 약 0.3° 간격 충전소 + 옆으로 비켜난 충전소 몇 곳 (용량 섞음)
+    rng = np.random.default_rng(1)
+    lat = np.r_[np.arange(35.0, 37.6, 0.3), 35.0 + rng.random(40) * 2.6]
+    lon = np.r_[np.full(9, 127.0), 126.6 + rng.random(40) * 0.8]
+    capacity = np.where(np.arange(len(lat)) % 3 == 0, "200kW", "50kW")
+    frame = pd.DataFrame({
+        "station_id": np.arange(1, len(lat) + 1),
+        "station_name": [f"충전소{i}" for i in range(1, len(lat) + 1)],
+        "region_name": "충청남도",
+        "district_name": "논산시",
+        "latitude": lat,
+        "longitude": lon,
+        "capacity": capacity,
+        "charger_type": "DC콤보",
+    })
+    monkeypatch.setattr(spatial_utils, "load_or_create_nationwide_data", lambda: frame)
+    for cached in (get_station_points, get_station_grid, get_charger_graph):
+        cached.clear()
+    yield frame
+    for cached in (get_station_points, get_station_grid, get_charger_graph):
+        cached.clear()
+
+
+def reference_cost(origin, destination, range_km, min_kw):
+    """그래프 노드 전체 쌍 거리로 푼 다익스트라 - 비용 = 도로 거리 + 충전 1회당 STOP_PENALTY_KM"""
+    bucket = range_bucket(range_km)
+    nodes = get_charger_graph(bucket, min_kw)["nodes"]
+    lat, lon = nodes["latitude"].to_numpy(), nodes["longitude"].to_numpy()
+    direct = float(_road_km(*origin, *destination))
+    if direct <= bucket:
+        return direct
+    pair = _road_km(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+    from_origin = _road_km(*origin, lat, lon)
+    to_goal = _road_km(lat, lon, *destination)
+
+    best = np.full(len(nodes), np.inf)
+    heap = []
+    for v in np.flatnonzero(from_origin <= bucket):
+        best[v] = from_origin[v] + STOP_PENALTY_KM
+        heapq.heappush(heap, (best[v], v))
+    answer = np.inf
+    while heap:
+        cost, u = heapq.heappop(heap)
+        if cost > best[u]:
+            continue
+        if to_goal[u] <= bucket:
+            answer = min(answer, cost + to_goal[u])
+        for v in np.flatnonzero((pair[u] <= bucket) & (np.arange(len(nodes)) != u)):
+            if cost + pair[u, v] + STOP_PENALTY_KM < best[v]:
+                best[v] = cost + pair[u, v] + STOP_PENALTY_KM
+                heapq.heappush(heap, (best[v], v))
+    return answer
+
+
+def route_cost(route):
+    return route["total_km"] + STOP_PENALTY_KM * len(route["stops"])
+
+
+def test_short_trip_needs_no_stops(stations):
+    route = plan_route((36.0, 127.0), (36.3, 127.0), 100)
+    assert route["stops"].empty
+    assert route["total_km"] == pytest.approx(route["direct_km"])
+
+
+@pytest.mark.parametrize("range_km, min_kw", [(100, 0), (120, 0), (160, 0), (160, 200)])
+def test_route_is_feasible_and_optimal(stations, range_km, min_kw):
+    origin, destination = (34.95, 127.0), (37.45, 127.0)
+    route = plan_route(origin, destination, range_km, min_kw)
+    assert route is not None
+
+    assert len(route["stops"]) > 0
+    assert (route["legs_km"] <= range_bucket(range_km) + 1e-6).all()
+    assert (route["stops"]["max_kw"] >= min_kw).all()
+    assert route_cost(route) == pytest.approx(reference_cost(origin, destination, range_km, min_kw), rel=1e-4)
+
+
+def test_unreachable_destination(stations):
+    # 가장 가까운 충전소와도 주행 거리보다 멀리 떨어진 도착지
+    assert plan_route((35.0, 127.0), (39.5, 127.0), 100) is None
+
+
+def offsets_to_polyline(points, polyline):
+    """충전소마다 경로 선분들까지의 최소 거리(km) - 전체 쌍 계산"""
+    lat, lon = (np.asarray(v, dtype=float) for v in zip(*polyline))
+    best = np.full(len(points), np.inf)
+    for a in range(len(lat) - 1):
+        kx = KM_PER_DEG_LAT * np.cos(np.radians((lat[a] + lat[a + 1]) / 2))
+        dx, dy = (lon[a + 1] - lon[a]) * kx, (lat[a + 1] - lat[a]) * KM_PER_DEG_LAT
+        px = (points["longitude"].to_numpy() - lon[a]) * kx
+        py = (points["latitude"].to_numpy() - lat[a]) * KM_PER_DEG_LAT
+        t = np.clip((px * dx + py * dy) / (dx * dx + dy * dy), 0, 1)
+        best = np.minimum(best, np.hypot(px - t * dx, py - t * dy))
+    return best
+
+
+@pytest.mark.parametrize("width_km", [3, 10, 20])
+def test_corridor_matches_full_scan(stations, width_km):
+    polyline = [(35.0, 126.7), (36.0, 127.0), (37.4, 127.2)]
+    found = corridor_stations(polyline, width_km)
+    points = get_station_points()
+    offsets = offsets_to_polyline(points, polyline)
+
+    ids = set(found["station_id"])
+    # 경로를 잘게 나눈 구간으로 재므로 경계 근처(수십 m)는 어느 쪽이든 허용
+    assert set(points["station_id"][offsets < width_km - 0.05]) <= ids
+    assert ids <= set(points["station_id"][offsets <= width_km + 0.05])
+    assert found["route_km"].is_monotonic_increasing
+    assert (found["offset_km"] <= width_km + 0.01).all()
+
+
+def test_corridor_filters_connectors_and_capacity(stations):
+    polyline = [(35.0, 127.0), (37.4, 127.0)]
+    assert corridor_stations(polyline, 20, connectors=CONNECTOR_BITS["AC완속"]).empty
+    fast = corridor_stations(polyline, 20, min_kw=200)
+    assert len(fast) and (fast["max_kw"] >= 200).all()
@@ -0,0 +1,50 @@
+# tests/test_search_utils.py
+import pandas as pd
+import pytest
+
+import search_utils
+from search_utils import get_station_search_index, search_stations, to_initials
+
+
+@pytest.fixture
+def search_index(monkeypatch):
+    stations = pd.DataFrame({
+        "station_id": [1, 2, 3, 4, 5],
+        "station_name": ["논산시청", "논산역 공영주차장", "서울시청", "대전 논산휴게소", "닭갈비 거리"],
+        "clean_address": ["충청남도 논산시 시민로", "충청남도 논산시 해월로", "서울특별시 중구 세종대로",
+                          "충청남도 논산시 연무읍", "강원도 춘천시"],
+        "region_name": ["충청남도", "충청남도", "서울특별시", "충청남도", "강원도"],
+        "district_name": ["논산시", "논산시", "중구", "논산시", "춘천시"],
+        "latitude": [36.18, 36.2, 37.56, 36.1, 37.88],
+        "longitude": [127.09, 127.08, 126.97, 127.1, 127.73],
+    })
+    monkeypatch.setattr(search_utils, "load_or_create_nationwide_data", lambda: stations)
+    get_station_search_index.clear()
+    yield get_station_search_index()
+    get_station_search_index.clear()
+
+
+def test_to_initials():
+    assert to_initials("논산 시청") == "ㄴㅅㅅㅊ"
+
+
+def test_initials_query_matches_name_initials(search_index):
+    assert search_stations(search_index, "ㄴㅅㅅㅊ")["station_id"].tolist() == [1]
+    # 이름 앞부분 일치가 먼저, 같은 순위 안에서는 이름이 짧은 순
+    assert search_stations(search_index, "ㄴㅅ")["station_id"].tolist() == [1, 2, 4]
+
+
+def test_initials_query_with_several_words(search_index):
+    assert search_stations(search_index, "ㄴㅅ ㅎㄱ")["station_id"].tolist() == [4]
+
+
+def test_partial_syllable_query(search_index):
+    # 입력 중인 글자('논ㅅ', '닭' 을 치는 중의 '달')도 일치
+    assert search_stations(search_index, "논ㅅ")["station_id"].tolist()[:2] == [1, 2]
+    assert search_stations(search_index, "달")["station_id"].tolist() == [5]
+
+
+def test_address_match_fills_after_names(search_index):
+    result = search_stations(search_index, "논산")["station_id"].tolist()
+    assert result[:3] == [1, 2, 4]
+    assert 3 not in result
@@ -0,0 +1,105 @@
+# tests/test_spatial_utils.py
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib.path import Path
+
+import spatial_utils
+from spatial_utils import (
+    CONNECTOR_BITS, build_grid_index, connector_mask, get_station_grid, get_station_points, grid_query,
+    stations_in_polygons
+)
+
+
+def station_frame(lat, lon, capacity="50kW", charger_type="DC콤보"):
+    n = len(lat)
+    return pd.DataFrame({
+        "station_id": np.arange(1, n + 1),
+        "station_name": [f"충전소{i}" for i in range(1, n + 1)],
+        "region_name": "충청남도",
+        "district_name": "논산시",
+        "latitude": lat,
+        "longitude": lon,
+        "capacity": capacity,
+        "charger_type": charger_type,
+    })
+
+
+@pytest.fixture
+def use_stations(monkeypatch):
+    """전국 스냅샷 대신 주어진 충전소 프레임을 쓰게 하고 공간 색인 캐시를 비운다"""
+    def use(frame):
+        monkeypatch.setattr(spatial_utils, "load_or_create_nationwide_data", lambda: frame)
+        get_station_points.clear()
+        get_station_grid.clear()
+    yield use
+    get_station_points.clear()
+    get_station_grid.clear()
+
+
+def test_connector_mask_combines_types():
+    mask = connector_mask(pd.Series(["DC콤보+DC차데모", "AC완속", None, "기타"]))
+    assert mask.tolist() == [CONNECTOR_BITS["DC콤보"] | CONNECTOR_BITS["DC차데모"], CONNECTOR_BITS["AC완속"], 0, 0]
+
+
+def test_station_points_one_row_per_station(use_stations):
+    frame = pd.concat([
+        station_frame(lat=[36.0, 36.1], lon=[127.0, 127.1]),
+        station_frame(lat=[36.0, 36.1], lon=[127.0, 127.1], capacity="200kW", charger_type="AC완속"),
+    ], ignore_index=True)
+    use_stations(frame)
+    points = get_station_points()
+    assert points["station_id"].tolist() == [1, 2]
+    assert points["max_kw"].tolist() == [200.0, 200.0]
+    assert points["charger_count"].tolist() == [2, 2]
+    assert points["connectors"].tolist() == [CONNECTOR_BITS["DC콤보"] | CONNECTOR_BITS["AC완속"]] * 2
+
+
+def test_grid_query_covers_box():
+    rng = np.random.default_rng(0)
+    lat = 35.0 + rng.random(2000)
+    lon = 127.0 + rng.random(2000)
+    grid = build_grid_index(lat, lon, 5)
+    box = (35.3, 35.5, 127.2, 127.6)
+    found = set(grid_query(grid, *box).tolist())
+    inside = np.flatnonzero((lat >= box[0]) & (lat <= box[1]) & (lon >= box[2]) & (lon <= box[3]))
+    # 셀 단위 후보라 상자 밖 점도 섞일 수 있지만, 상자 안 점은 모두 들어 있어야 한다
+    assert set(inside.tolist()) <= found
+
+
+# 외곽 0.4° 정사각형 가운데에 0.2° 구멍 (GeoJSON 순서: [lon, lat])
+OUTER = [[127.0, 36.0], [127.4, 36.0], [127.4, 36.4], [127.0, 36.4], [127.0, 36.0]]
+HOLE = [[127.1, 36.1], [127.3, 36.1], [127.3, 36.3], [127.1, 36.3], [127.1, 36.1]]
+
+
+def test_polygon_hole_is_excluded(use_stations):
+    use_stations(station_frame(
+        lat=[36.05, 36.2, 36.35, 36.5, 36.2],
+        lon=[127.05, 127.2, 127.35, 127.2, 127.5],
+    ))
+    found = stations_in_polygons([[OUTER, HOLE]])
+    # 1, 3: 외곽 안·구멍 밖 / 2: 구멍 안 / 4, 5: 외곽 밖
+    assert sorted(found["station_id"]) == [1, 3]
+
+    # 구멍이 없으면 가운데 충전소도 포함
+    assert sorted(stations_in_polygons([[OUTER]])["station_id"]) == [1, 2, 3]
+
+
+def test_polygons_match_full_scan(use_stations):
+    rng = np.random.default_rng(0)
+    lat = 35.8 + rng.random(5000) * 0.8
+    lon = 126.8 + rng.random(5000) * 0.8
+    use_stations(station_frame(lat, lon))
+
+    lasso = [[126.9, 36.0], [127.2, 36.5], [127.5, 36.3], [127.3, 35.9], [126.9, 36.0]]
+    polygons = [[OUTER, HOLE], [lasso]]
+    found = set(stations_in_polygons(polygons)["station_id"])
+
+    xy = np.column_stack([lon, lat])
+    expected = np.zeros(len(xy), dtype=bool)
+    for rings in polygons:
+        hit = Path(np.asarray(rings[0])).contains_points(xy)
+        for hole in rings[1:]:
+            hit &= ~Path(np.asarray(hole)).contains_points(xy)
+        expected |= hit
+    assert found == set(np.flatnonzero(expected) + 1)
@@ -0,0 +1,39 @@
+# tests/test_sync_utils.py
+import pandas as pd
+
+from sync_utils import diff_row_hashes
+
+
+def _hashes(rows):
+    return pd.DataFrame(rows, columns=["station_id", "charger_local_id", "region_name", "row_hash"])
+
+
+def test_diff_row_hashes_insert_update_delete():
+    old = _hashes([
+        (1, 1, "서울특별시", "aaa"),
+        (1, 2, "서울특별시", "bbb"),
+        (2, 1, "충청남도", "ccc"),
+    ])
+    new = _hashes([
+        (1, 1, "서울특별시", "aaa"),      # 그대로
+        (1, 2, "서울특별시", "bbb-2"),    # 내용 변경
+        (3, 1, "대전광역시", "ddd"),      # 새 충전기
+    ])                                    # (2, 1) 삭제
+
+    diff = diff_row_hashes(old, new)
+
+    assert diff["inserted"].to_dict("records") == [
+        {"station_id": 3, "charger_local_id": 1, "region_name": "대전광역시"}
+    ]
+    assert diff["changed"].to_dict("records") == [
+        {"station_id": 1, "charger_local_id": 2, "region_name": "서울특별시"}
+    ]
+    assert diff["deleted"].to_dict("records") == [
+        {"station_id": 2, "charger_local_id": 1, "region_name": "충청남도"}
+    ]
+
+
+def test_diff_row_hashes_no_changes():
+    rows = _hashes([(1, 1, "서울특별시", "aaa"), (2, 1, "충청남도", "ccc")])
+    diff = diff_row_hashes(rows, rows.copy())
+    assert all(part.empty for part in diff.values())
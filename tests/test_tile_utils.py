@@ -0,0 +1,32 @@
+# tests/test_tile_utils.py
+import numpy as np
+
+from tile_utils import build_density_tiles, read_tile_manifest
+
+ZOOMS = range(5, 10)
+
+
+def test_partial_rebuild_matches_full_rebuild(cache_dir, station_rows):
+    before = station_rows[["station_id", "latitude", "longitude"]].copy()
+    build_density_tiles(before, zooms=ZOOMS)
+
+    # 충전소 몇 곳을 옮기고, 몇 곳은 없앤다
+    moved_ids = before["station_id"].drop_duplicates().iloc[:5].tolist()
+    deleted_ids = before["station_id"].drop_duplicates().iloc[5:8].tolist()
+    after = before[~before["station_id"].isin(deleted_ids)].copy()
+    after.loc[after["station_id"].isin(moved_ids), "latitude"] += 0.3
+    touched = moved_ids + deleted_ids
+    coords = np.concatenate([
+        before.loc[before["station_id"].isin(touched), ["latitude", "longitude"]].to_numpy(),
+        after.loc[after["station_id"].isin(touched), ["latitude", "longitude"]].to_numpy(),
+    ])
+
+    report = build_density_tiles(after, zooms=ZOOMS, changed=(coords[:, 0], coords[:, 1]))
+    partial = read_tile_manifest()["tiles"]
+    assert report["mode"] == "partial"
+    assert report["rendered"] < report["tiles"]
+
+    full = build_density_tiles(after, zooms=ZOOMS)
+    assert full["mode"] == "full"
+    assert full["written"] == 0 and full["removed"] == 0
+    assert read_tile_manifest()["tiles"] == partial
@@ -0,0 +1,229 @@
+# tile_utils.py
+# 🧱 전국 충전기 밀도 타일 (Web Mercator z/x/y PNG)
+#  - 전국 스냅샷의 충전기 좌표를 줌 단계별 픽셀 격자에 모아 km² 당 충전기 수로 환산 → 흐림 → 색 입힘
+#  - static/tiles/density/ 에 저장하고 Streamlit 정적 서빙(/app/static/...)으로 folium TileLayer 가 불러간다
+#  - 색 척도가 고정(km² 당 밀도, 로그)이라 데이터가 바뀐 곳의 타일만 달라진다
+#    → manifest.json 의 타일별 해시와 비교해 바뀐 타일만 다시 쓰고, 없어진 타일은 지운다
+#  생성/갱신: python tile_utils.py  (sync_utils 가 전국 스냅샷을 고치면 바뀐 충전소 근처 타일만 다시 그림)
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+import folium
+import matplotlib
+import numpy as np
+import streamlit as st
+from PIL import Image
+
+from cache_utils import atomic_publish, file_lock
+from utils import build_nationwide_snapshot
+
+logger = logging.getLogger(__name__)
+
+TILE_DIR = os.path.join("static", "tiles", "density")
+MANIFEST_PATH = os.path.join(TILE_DIR, "manifest.json")
+TILE_URL_PATH = "app/static/tiles/density/{z}/{x}/{y}.png"
+TILE_SIZE = 256
+TILE_MIN_ZOOM = 5
+TILE_MAX_ZOOM = 12              # 이보다 확대하면 브라우저가 12단계 타일을 늘려 보여준다
+BLUR_RADIUS = 2                 # 상자 흐림(두 번) 반경 (px)
+DENSITY_RANGE = (0.05, 50.0)    # 색 척도 양 끝 - km² 당 충전기 수 (로그 척도)
+COLORMAP = "inferno"
+EARTH_METERS_PER_PIXEL = 156543.03392  # 줌 0, 적도 기준
+
+
+def _mercator_pixels(lat, lon, zoom):
+    scale = TILE_SIZE * (1 << zoom)
+    lat_rad = np.radians(np.clip(lat, -85.05112878, 85.05112878))
+    px = (lon + 180.0) / 360.0 * scale
+    py = (1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / np.pi) / 2.0 * scale
+    return px.astype(np.int64), py.astype(np.int64)
+
+
+def _tile_center_lat(y, zoom):
+    n = np.pi - 2.0 * np.pi * (y + 0.5) / (1 << zoom)
+    return np.degrees(np.arctan(np.sinh(n)))
+
+
+def _box_blur(grid, radius):
+    # 누적합으로 가로/세로 상자 평균 (두 번 적용하면 가우시안에 가깝다)
+    k = 2 * radius + 1
+    for axis in (0, 1):
+        pad = [(0, 0), (0, 0)]
+        pad[axis] = (radius + 1, radius)
+        c = np.cumsum(np.pad(grid, pad), axis=axis)
+        grid = (np.take(c, range(k, c.shape[axis]), axis=axis) - np.take(c, range(0, c.shape[axis] - k), axis=axis)) / k
+    return grid
+
+
+_LUT = (matplotlib.colormaps[COLORMAP](np.linspace(0.15, 1.0, 256)) * 255).astype(np.uint8)
+
+
+def _colorize(density):
+    lo, hi = np.log10(DENSITY_RANGE[0]), np.log10(DENSITY_RANGE[1])
+    t = np.clip((np.log10(np.maximum(density, 1e-12)) - lo) / (hi - lo), 0.0, 1.0)
+    rgba = _LUT[(t * 255).astype(np.uint8)]
+    # 최소 밀도 미만은 투명, 진할수록 불투명
+    rgba[..., 3] = np.where(density >= DENSITY_RANGE[0], 110 + 140 * t, 0).astype(np.uint8)
+    return rgba
+
+
+def tiles_near(lat, lon, zoom):
+    """
+    한 줌 단계에서 좌표들이 그려지는 타일 {(x, y)} - 흐림이 타일 경계를 넘어 번지는 이웃 타일까지.
+    """
+    finite = np.isfinite(lat) & np.isfinite(lon)
+    ix, iy = _mercator_pixels(lat[finite], lon[finite], zoom)
+    pad = 2 * BLUR_RADIUS
+    n = 1 << zoom
+    tiles = set()
+    for dx in (-pad, 0, pad):
+        for dy in (-pad, 0, pad):
+            keys = np.unique(((ix + dx) // TILE_SIZE) * n + (iy + dy) // TILE_SIZE).tolist()
+            tiles.update(divmod(key, n) for key in keys)
+    return {(x, y) for x, y in tiles if 0 <= x < n and 0 <= y < n}
+
+
+def iter_density_tiles(lat, lon, weight, zoom, tiles=None):
+    """
+    한 줌 단계의 (x, y, RGBA 배열) 을 내보낸다. 점이 있거나 흐림이 번지는 타일만.
+    tiles={(x, y)} 를 주면 그 타일만 그린다 (증분 갱신).
+    """
+    ix, iy = _mercator_pixels(lat, lon, zoom)
+    pad = 2 * BLUR_RADIUS
+    width = TILE_SIZE + 2 * pad
+    n = 1 << zoom
+
+    keys = (ix // TILE_SIZE) * n + (iy // TILE_SIZE)
+    order = np.argsort(keys, kind="stable")
+    uniq, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+    groups = {int(k): order[s:s + c] for k, s, c in zip(uniq, starts, counts)}
+
+    for x, y in sorted(tiles_near(lat, lon, zoom) if tiles is None else tiles):
+        idx = [groups[k] for k in ((x + i) * n + (y + j) for i in (-1, 0, 1) for j in (-1, 0, 1)) if k in groups]
+        if not idx:
+            continue
+        idx = np.concatenate(idx)
+        gx = ix[idx] - x * TILE_SIZE + pad
+        gy = iy[idx] - y * TILE_SIZE + pad
+        inside = (gx >= 0) & (gx < width) & (gy >= 0) & (gy < width)
+        if not inside.any():
+            continue
+
+        grid = np.bincount(gy[inside] * width + gx[inside], weights=weight[idx][inside], minlength=width * width)
+        grid = _box_blur(_box_blur(grid.reshape(width, width), BLUR_RADIUS), BLUR_RADIUS)[pad:-pad, pad:-pad]
+
+        pixel_km = EARTH_METERS_PER_PIXEL * np.cos(np.radians(_tile_center_lat(y, zoom))) / n / 1000
+        rgba = _colorize(grid / pixel_km ** 2)
+        if rgba[..., 3].any():
+            yield x, y, rgba
+
+
+def _station_points(df):
+    # 충전소 좌표별 충전기 수 (같은 좌표의 충전기는 한 점으로)
+    stations = (
+        df[["latitude", "longitude"]].astype("float64").dropna()
+        .groupby(["latitude", "longitude"]).size().reset_index(name="chargers")
+    )
+    return stations["latitude"].to_numpy(), stations["longitude"].to_numpy(), stations["chargers"].to_numpy("float64")
+
+
+def read_tile_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_density_tiles(df=None, zooms=range(TILE_MIN_ZOOM, TILE_MAX_ZOOM + 1), changed=None):
+    """
+    밀도 타일을 만들거나 갱신한다. 내용(해시)이 바뀐 타일만 다시 쓰고, 없어진 타일은 지운다.
+    changed=(위도 배열, 경도 배열): 바뀐 충전소의 이전/새 좌표 - 주면 그 근처 타일만 다시 그린다
+    (같은 줌 범위의 manifest 가 있을 때. 없으면 전체를 그린다).
+    반환: 리포트 dict (version, mode, tiles, rendered, written, removed, elapsed_s)
+    """
+    start = time.perf_counter()
+    df = build_nationwide_snapshot() if df is None else df
+    lat, lon, weight = _station_points(df)
+
+    with file_lock(TILE_DIR + ".lock"):
+        manifest = read_tile_manifest() or {}
+        previous = manifest.get("tiles", {})
+        partial = changed is not None and bool(previous) and manifest.get("zooms") == [min(zooms), max(zooms)]
+        # 증분이면 이전 타일 목록에서 다시 그릴 타일만 빼고 시작한다
+        tiles, written, rendered = (dict(previous) if partial else {}), 0, 0
+        for zoom in zooms:
+            targets = None
+            if partial:
+                targets = tiles_near(np.asarray(changed[0], "float64"), np.asarray(changed[1], "float64"), zoom)
+                for x, y in targets:
+                    tiles.pop(f"{zoom}/{x}/{y}", None)
+            for x, y, rgba in iter_density_tiles(lat, lon, weight, zoom, tiles=targets):
+                rendered += 1
+                tile_id = f"{zoom}/{x}/{y}"
+                digest = hashlib.blake2b(rgba.tobytes(), digest_size=8).hexdigest()
+                tiles[tile_id] = digest
+                path = os.path.join(TILE_DIR, f"{tile_id}.png")
+                if previous.get(tile_id) == digest and os.path.exists(path):
+                    continue
+                atomic_publish(path, lambda tmp_path: Image.fromarray(rgba, "RGBA").save(tmp_path, format="PNG", optimize=True))
+                written += 1
+
+        removed = [tile_id for tile_id in previous if tile_id not in tiles]
+        for tile_id in removed:
+            path = os.path.join(TILE_DIR, f"{tile_id}.png")
+            if os.path.exists(path):
+                os.remove(path)
+
+        # 데이터 버전 = 타일 해시 전체의 해시 → URL 에 붙여 브라우저 캐시를 갈아끼운다
+        version = hashlib.blake2b(json.dumps(tiles, sort_keys=True).encode(), digest_size=6).hexdigest()
+        manifest = {
+            "version": version,
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "zooms": [min(zooms), max(zooms)],
+            "tiles": tiles,
+        }
+
+        def write(tmp_path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+
+        atomic_publish(MANIFEST_PATH, write)
+
+    report = {
+        "version": version, "mode": "partial" if partial else "full", "tiles": len(tiles),
+        "rendered": rendered, "written": written, "removed": len(removed),
+        "elapsed_s": round(time.perf_counter() - start, 2),
+    }
+    logger.info("밀도 타일: %s", report)
+    return report
+
+
+def add_density_layer(m):
+    """
+    m 에 밀도 타일 레이어를 얹는다. 타일이 아직 없으면 False.
+    """
+    manifest = read_tile_manifest()
+    if manifest is None:
+        return False
+    base = st.get_option("server.baseUrlPath").strip("/")
+    url = f"/{base + '/' if base else ''}{TILE_URL_PATH}?v={manifest['version']}"
+    folium.TileLayer(
+        tiles=url,
+        attr=f"충전기 밀도 ({manifest['generated_at']})",
+        name="충전기 밀도",
+        overlay=True,
+        opacity=0.85,
+        min_zoom=TILE_MIN_ZOOM,
+        max_native_zoom=TILE_MAX_ZOOM,
+        max_zoom=18,
+    ).add_to(m)
+    return True
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(build_density_tiles(), ensure_ascii=False, indent=2))
@@ -1,21 +1,28 @@
 #utils.py
-from math import radians, cos, sin, sqrt, atan2
+import numpy as np
 import pandas as pd
 import streamlit as st
-from db_utils import engine
+from db_utils import read_sql
 from sqlalchemy import text
 import folium
 from folium.plugins import MarkerCluster
-from db_utils import get_station_data
+from branca.element import MacroElement
+from jinja2 import Template
+from db_utils import register_shared_frame, iter_station_batches, NATIONWIDE_SNAPSHOT_NAME
+from cache_utils import cache_path, get_or_build_file, write_batches
+import json
 import os
+import logging
+
+logger = logging.getLogger(__name__)
 
 # 🌍 위도/경도 기반 거리 계산 함수 (단위: km)
+# 스칼라도, numpy 배열도 받는다 (배열끼리는 브로드캐스팅 - 점 N개 × 점 M개 거리표도 한 번에)
 def haversine(lat1, lon1, lat2, lon2):
     R = 6371
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-    return 2 * R * atan2(sqrt(a), sqrt(1 - a))
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * R * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
 
 
 
@@ -97,7 +104,7 @@ def get_region_center(region_name):
     FROM region_centers
     WHERE region = :region
     """)
-    df = pd.read_sql(query, engine, params={"region": region_name})
+    df = read_sql(query, params={"region": region_name})
     if df.empty:
         return None, None
     return df.iloc[0]['latitude'], df.iloc[0]['longitude']
@@ -111,8 +118,8 @@ def get_sorted_district_list(region_name, lat, lon):
     JOIN district_centers dc ON d.district_id = dc.district_id
     WHERE r.region = :region
     """)
-    df = pd.read_sql(query, engine, params={"region": region_name})
-    df['distance'] = df.apply(lambda row: haversine(lat, lon, row['latitude'], row['longitude']), axis=1)
+    df = read_sql(query, params={"region": region_name})
+    df['distance'] = haversine(lat, lon, df['latitude'].to_numpy(), df['longitude'].to_numpy())
     return df.sort_values('distance')['district_name'].tolist()
 
 
@@ -179,51 +186,174 @@ def get_marker_color(charger_type, color_map=None):
 
 
 
-@st.cache_data(ttl=60)
-def generate_map(df, center_lat, center_lon, clicked_station_id):
-    m = folium.Map(location=[center_lat, center_lon], zoom_start=17)
-    cluster = MarkerCluster().add_to(m)
-
-    for station_id in df['station_id'].unique():
-        row = df[df['station_id'] == station_id].iloc[0]
-
-        # ⛔ NaN 좌표 무시
-        if pd.isna(row['latitude']) or pd.isna(row['longitude']):
-            continue
-
-        is_selected = station_id == clicked_station_id
-        type_string = f"{row['charger_type']}({row['capacity']}kW)"
-        color = get_marker_color(type_string)
-        icon = "star" if is_selected else get_marker_icon(type_string)
-
-        popup_html = f"""
+def _station_popup(row):
+    popup_html = f"""
         <div style='width:250px;'>
             <b>📍 {row['station_name']}</b><br>
             🔌 충전기 수: {row['charger_local_id']}<br>
             ⚡ {row['capacity']}
         </div>"""
+    return folium.Popup(folium.Html(popup_html, script=True), max_width=300)
+
+
+# 🎯 캔버스 렌더링 - 충전소 전체를 GeoJSON 한 덩어리로 보내고, 브라우저에서 원형 마커를 캔버스에 그린다
+#  - 마커별 Icon/Popup/HTML 객체를 만들지 않으므로 지도 HTML 크기와 그리는 시간이 충전소 수에 비해 작다
+#  - 색상은 feature 의 팔레트 번호(c), 팝업은 클릭할 때 feature 속성으로 만든다
+MAP_RENDER_MODES = {"auto": "자동", "cluster": "마커 클러스터", "canvas": "캔버스 (GeoJSON)"}
+CANVAS_AUTO_THRESHOLD = 300  # auto 모드에서 충전소가 이보다 많으면 캔버스
+
+# folium.Icon 색 이름 → 범례(Legend_Customization)와 같은 CSS 색
+MARKER_CSS_COLORS = {
+    "darkpurple": "rebeccapurple", "orange": "orange", "green": "mediumseagreen",
+    "lightblue": "lightblue", "blue": "cornflowerblue", "pink": "deeppink",
+    "darkred": "darkred", "cadetblue": "cadetblue", "gray": "gray",
+}
+
+
+class CanvasStationLayer(MacroElement):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = (function() {
+            var palette = {{ this.palette|tojson }};
+            var renderer = L.canvas({padding: 0.5});
+            function esc(s) {
+                return String(s == null ? "" : s).replace(/[&<>"']/g, function(c) {
+                    return {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"}[c];
+                });
+            }
+            return L.geoJSON({{ this.data_json }}, {
+                pointToLayer: function(feature, latlng) {
+                    return L.circleMarker(latlng, {
+                        renderer: renderer, radius: 6, weight: 1, color: "#333",
+                        fillColor: palette[feature.properties.c], fillOpacity: 0.9
+                    });
+                },
+                onEachFeature: function(feature, layer) {
+                    var p = feature.properties;
+                    layer.bindTooltip(esc(p.n));
+                    layer.bindPopup(function() {
+                        return "<div style='width:250px;'><b>📍 " + esc(p.n) + "</b><br>" +
+                               "🔌 충전기 수: " + esc(p.k) + "<br>⚡ " + esc(p.cap) + "</div>";
+                    }, {maxWidth: 300});
+                }
+            }).addTo({{ this._parent.get_name() }});
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, stations):
+        super().__init__()
+        self._name = "CanvasStationLayer"
+        type_strings = stations['charger_type'].astype(str) + "(" + stations['capacity'].astype(str) + "kW)"
+        colors = type_strings.map(lambda t: MARKER_CSS_COLORS.get(get_marker_color(t), "gray"))
+        codes, self.palette = pd.factorize(colors)
+        self.palette = list(self.palette)
+        data = {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [round(float(lon), 6), round(float(lat), 6)]},
+                    "properties": {"n": name, "k": str(local_id), "cap": str(cap), "c": int(code)},
+                }
+                for lat, lon, name, local_id, cap, code in zip(
+                    stations['latitude'], stations['longitude'], stations['station_name'].astype(str),
+                    stations['charger_local_id'], stations['capacity'], codes
+                )
+            ],
+        }
+        # 한글을 \uXXXX 로 늘리지 않고 공백 없이 직렬화 ("</" 만 막아 script 태그가 닫히지 않게)
+        self.data_json = json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+
+def resolve_map_mode(mode, station_count):
+    if mode == "auto":
+        return "canvas" if station_count > CANVAS_AUTO_THRESHOLD else "cluster"
+    return mode
+
+
+# 🗺️ 범위(시/도, 구/군)별 기본 마커 레이어 - 선택이 바뀌어도 다시 만들지 않음
+@st.cache_resource(ttl=600, max_entries=32)
+def build_station_base_map(region, district, _df, mode="cluster", data_version=None):
+    """
+    범위별로 한 번만 기본 지도(클러스터 마커 또는 캔버스 GeoJSON)를 만든다.
+    data_version(db_utils.data_version(_df))이 캐시 키에 들어가 동기화 후에는 새로 만든다.
+    선택 강조와 중심 이동은 build_selection_layer + st_folium(center, zoom)으로 처리한다.
+    """
+    stations = _df.drop_duplicates("station_id").dropna(subset=["latitude", "longitude"])
+    if stations.empty:
+        center = [36.5, 127.9]
+    else:
+        center = [stations['latitude'].mean(), stations['longitude'].mean()]
+
+    m = folium.Map(location=center, zoom_start=13)
+    if resolve_map_mode(mode, len(stations)) == "canvas":
+        m.add_child(CanvasStationLayer(stations))
+        return m
 
-        popup = folium.Popup(folium.Html(popup_html, script=True), max_width=300)
-        marker = folium.Marker(
+    cluster = MarkerCluster().add_to(m)
+
+    for _, row in stations.iterrows():
+        type_string = f"{row['charger_type']}({row['capacity']}kW)"
+        folium.Marker(
             location=[row['latitude'], row['longitude']],
-            popup=popup,
+            popup=_station_popup(row),
             tooltip=row['station_name'],
-            icon=folium.Icon(color=color, icon=icon, prefix="fa")
-        )
-        marker.add_to(cluster)
+            icon=folium.Icon(color=get_marker_color(type_string), icon=get_marker_icon(type_string), prefix="fa")
+        ).add_to(cluster)
 
     return m
 
-@st.cache_data(ttl=600)
+
+# ⭐ 선택된 충전소만 담는 작은 오버레이 레이어
+def build_selection_layer(df, clicked_station_id):
+    layer = folium.FeatureGroup(name="selected_station")
+    if not clicked_station_id:
+        return layer
+
+    rows = df[df['station_id'] == clicked_station_id]
+    if rows.empty:
+        return layer
+
+    row = rows.iloc[0]
+    if pd.isna(row['latitude']) or pd.isna(row['longitude']):
+        return layer
+
+    type_string = f"{row['charger_type']}({row['capacity']}kW)"
+    folium.Marker(
+        location=[row['latitude'], row['longitude']],
+        popup=_station_popup(row),
+        tooltip=row['station_name'],
+        icon=folium.Icon(color=get_marker_color(type_string), icon="star", prefix="fa"),
+        z_index_offset=1000
+    ).add_to(layer)
+    return layer
+
+# 📦 전국 데이터 스냅샷 (압축 없는 Arrow IPC 파일 → 메모리 매핑)
+
+
+def _log_stream_progress(done, total):
+    logger.info("전국 스냅샷 생성: %s / %s 행", f"{done:,}", f"{total:,}" if total else "?")
+
+
+def build_nationwide_snapshot(rebuild=False, progress=_log_stream_progress):
+    """
+    서버 사이드 커서로 청크 단위로 읽어 Arrow 스냅샷에 바로 이어 쓴다 (메모리는 청크 크기만큼만 사용).
+    rebuild=True 이면 기존 스냅샷이 있어도 새로 만들어 교체한다 (정기 갱신용).
+    """
+    return get_or_build_file(
+        NATIONWIDE_SNAPSHOT_NAME,
+        lambda tmp_path: write_batches(iter_station_batches(progress=progress), tmp_path, fmt="arrow"),
+        fmt="arrow",
+        meta={"kind": "nationwide"},
+        rebuild=rebuild
+    )
+
+
+@st.cache_resource(ttl=600)
 def load_or_create_nationwide_data():
     """
-    전국 데이터 Parquet 파일이 없으면 생성하고, 있으면 불러온다.
+    전국 데이터 Arrow 스냅샷이 없으면 스트리밍으로 생성하고, 있으면 메모리 매핑으로 연다.
     """
-    file_path = "nationwide_charger_data.parquet"
-    if os.path.exists(file_path):
-        return pd.read_parquet(file_path)
-    else:
-        df = get_station_data()  # 지역/구군 조건 없이 전체 조회
-        df.to_parquet(file_path)
-        return df
-    
+    df = build_nationwide_snapshot()
+    return register_shared_frame(cache_path(NATIONWIDE_SNAPSHOT_NAME), df)